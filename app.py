@@ -1,26 +1,42 @@
 import streamlit as st
 import numpy as np
-import pickle
-from datetime import datetime
-from fpdf import FPDF
-from PIL import Image
-import speech_recognition as sr
-import tempfile
-import requests   # ✅ THIS LINE FIXES THE ERROR
-from tensorflow.keras.models import load_model
+import os
+from diagnostics.cache import cached_predict
+from diagnostics.metrics import inc, start_exporters, timed
+from diagnostics.warmup import readiness, start_warmup
+from diagnostics.reports import pdf_download_button
+from diagnostics.store import get_store, PAGE_SIZE
+from diagnostics.rules import alert_text, get_rules
+from diagnostics.registry import MODEL_SPECS, get_model, get_brain_model, brain_tflite_available, DEFAULT_BRAIN_RUNTIME
+# Heavy dependencies (TensorFlow, fpdf, PIL, speech_recognition, pandas) are
+# imported inside the pages that use them so the Signup/Login path stays fast.
+# scripts/check_import_time.py keeps that path under its import-time budget.
 # ===================== SESSION INIT =====================
 if 'page' not in st.session_state:
     st.session_state['page'] = 'Signup'
-if 'users' not in st.session_state:
-    st.session_state['users'] = {}
 if 'logged_in' not in st.session_state:
     st.session_state['logged_in'] = False
 if 'current_user' not in st.session_state:
     st.session_state['current_user'] = None
 if 'report' not in st.session_state:
     st.session_state['report'] = ""
-if 'appointments' not in st.session_state:
-    st.session_state['appointments'] = {}
+
+# Prometheus endpoint (+ /readyz) / file, if METRICS_PORT or METRICS_FILE is set (once per process)
+start_exporters()
+# Load and warm every model in the background (once per process)
+start_warmup()
+
+def is_admin(username):
+    # ADMIN_USERS: comma-separated usernames, from the environment or secrets.toml
+    admins = os.environ.get("ADMIN_USERS")
+    if admins is None:
+        try:
+            admins = st.secrets.get("ADMIN_USERS", "")
+        except FileNotFoundError:
+            admins = ""
+    if isinstance(admins, str):
+        admins = admins.split(",")
+    return username in {a.strip() for a in admins if a.strip()}
 
 # ===================== STYLES =====================
 st.markdown("""
@@ -47,58 +63,17 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ===================== PDF CREATOR =====================
-def create_pdf(username, disease, result_text, image=None):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "Multi Disease Diagnostic Report", ln=True, align="C")
-    pdf.ln(5)
-    pdf.set_font("Arial", size=12)
-    login_time = datetime.now().strftime("%d-%m-%Y %I:%M %p")
-    content = f"Username        : {username}\nLogin Time     : {login_time}\nDisease        : {disease}\n\nPrediction Result:\n{result_text}"
-    safe_text = content.encode("latin1","ignore").decode("latin1")
-    pdf.multi_cell(0,8,safe_text)
-    pdf.ln(5)
-    if image:
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(0, 10, "Uploaded MRI Image:", ln=True)
-        img_path = "temp_brain_image.jpg"
-        image.save(img_path)
-        pdf.image(img_path, x=30, w=150)
-        pdf.ln(10)
-    return pdf.output(dest="S").encode("latin1")
-
-# ===================== MODEL LOADERS =====================
-@st.cache_resource
-def load_pickle_model(path):
-    with open(path,"rb") as f:
-        data = pickle.load(f)
-    if isinstance(data, tuple):
-        model, scaler = data
-    else:
-        model = data['model']
-        scaler = data['scaler']
-    return model, scaler
-
-@st.cache_resource
-def load_brain_model(path="models/brain_tumor_model.h5"):
-    model = load_model(path)
-    return model
-
 # ===================== SIGNUP & LOGIN =====================
 def signup():
     st.title("📝 Signup")
     username = st.text_input("Enter username")
     password = st.text_input("Enter password", type="password")
     if st.button("Signup"):
-        if username in st.session_state['users']:
-            st.error("Username already exists!")
-        elif username=="" or password=="":
+        if username=="" or password=="":
             st.error("Enter valid credentials")
+        elif not get_store().create_user(username, password):
+            st.error("Username already exists!")
         else:
-            st.session_state['users'][username] = password
             st.success("Signup successful! Please login.")
             st.session_state['page'] = 'Login'
 
@@ -107,7 +82,7 @@ def login():
     username = st.text_input("Username")
     password = st.text_input("Password", type="password")
     if st.button("Login"):
-        if username in st.session_state['users'] and st.session_state['users'][username]==password:
+        if get_store().verify_user(username, password):
             st.session_state['logged_in'] = True
             st.session_state['current_user'] = username
             st.session_state['page'] = 'Home'
@@ -126,56 +101,120 @@ def home_dashboard():
         ("🧠 Brain Tumor","brain_card","Predict Brain Tumor","Brain"),
         ("🟣 Kidney","kidney_card","Predict Kidney Disease","Kidney"),
         ("🟠 Liver","liver_card","Predict Liver Disease","Liver"),
+        ("🩺 Full Screening","screening_card","Heart, Diabetes, Kidney & Liver at once","Screening"),
         ("🎙️ Speech to Text","speech_card","Voice Input","Speech")
     
     ]
+    if is_admin(st.session_state['current_user']):
+        cards.append(("📊 Metrics","metrics_card","Latency, caches & memory","Metrics"))
+    warmup_status()
     for title,key,subtitle,page in cards:
         if st.button(title,key=key):
             st.session_state['page'] = page
         st.markdown(f'<div class="card"><div class="card-title">{title}</div><div class="card-subtitle">{subtitle}</div></div>', unsafe_allow_html=True)
     
+    prediction_history()
+
     if st.button("Logout", key="logout_card"):
         st.session_state['logged_in'] = False
         st.session_state['current_user'] = None
         st.session_state['page'] = 'Login'
     st.markdown('</div>', unsafe_allow_html=True)
 
+@st.fragment
+def prediction_history():
+    # Paging through history reruns only this block, not the dashboard
+    store = get_store()
+    username = st.session_state['current_user']
+    total = store.count_predictions(username)
+    if total:
+        with st.expander(f"📜 Prediction History ({total})"):
+            paginated_history(
+                "predictions", total,
+                lambda offset: store.predictions(username, PAGE_SIZE, offset),
+                lambda row: f"- {row['created_at']} — **{row['disease']}**: {row['result']}"
+            )
+
+def warmup_status():
+    status = readiness()
+    models = status['models']
+    if not models:
+        return
+    if status['ready']:
+        st.caption(f"✅ All {len(models)} models loaded and warmed up")
+        return
+    ready = sum(s['state'] == 'ready' for s in models.values())
+    failed = {name: s.get('error', '') for name, s in models.items() if s['state'] == 'failed'}
+    if failed:
+        st.warning("⚠️ Some models failed to load: " + "; ".join(f"{name} ({error})" for name, error in failed.items()))
+    if ready + len(failed) < len(models):
+        st.info(f"⏳ Warming up models: {ready} of {len(models)} ready. The first prediction may be slower.")
+
 # ===================== DISEASE INPUTS =====================
 # ===================== GENERIC DISEASE PAGE =====================
-def disease_page(disease_name, model_loader, input_func):
+def disease_page(disease_name, model_name):
     st.header(f"🧪 {disease_name} Prediction")
 
-    inputs = input_func()
-
-    if st.button("🔍 Predict"):
+    mode = st.radio("Mode", ["Single Patient", "Batch File"], horizontal=True)
+    if mode == "Batch File":
+        from diagnostics.batch import batch_scoring_section
+        bundle = get_model(model_name)
+        batch_scoring_section(disease_name, bundle.model, bundle.scaler, bundle.features,
+                              rules=get_rules(model_name, bundle.features))
+        st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+        return
+
+    # Inputs are batched in a form: editing them doesn't rerun the app,
+    # only pressing Predict does
+    with st.form(f"{model_name}_form"):
+        inputs = spec_inputs(model_name)
+        submitted = st.form_submit_button("🔍 Predict")
+
+    if submitted:
         try:
-            model, scaler = model_loader()
-
-            X = np.array(inputs).reshape(1, -1)
-            X_scaled = scaler.transform(X)
-
-            prediction = model.predict(X_scaled)[0]
-
-            if prediction == 1:
+            bundle = get_model(model_name)
+
+            # Same rule-based pre-filter as the standalone pages; the model
+            # only runs when no rule fires
+            rules = get_rules(model_name, bundle.features)
+            fired = rules.evaluate(inputs)[0]
+            if fired.any():
+                prediction = None
+            else:
+                # Repeated clicks with the same inputs are answered from the shared cache
+                prediction = cached_predict(bundle, inputs)
+            inc("predictions_total", disease=disease_name)
+
+            factors = None
+            if prediction is not None:
+                # Occlusion attributions: one batched model call, cached per input vector
+                from diagnostics.explain import attribution_section, factor_lines, top_factors
+                attribution_section(bundle, inputs)
+                factors = factor_lines(top_factors(bundle, inputs))
+
+            if prediction is None:
+                result_text = f"⚠️ {alert_text(disease_name, rules.describe(fired))}"
+            elif prediction == 1:
                 result_text = f"⚠️ {disease_name} Detected"
                 
             else:
                 result_text = f"✅ No {disease_name} Detected"
                 
+            with timed("store_write"):
+                get_store().add_prediction(st.session_state['current_user'], disease_name, result_text, inputs)
 
-            # PDF
-            pdf_bytes = create_pdf(
-                username=st.session_state['current_user'],
-                disease=disease_name,
-                result_text=result_text
-            )
-            st.download_button(
+            # PDF (built only when the button is clicked)
+            pdf_download_button(
                 "📄 Download PDF Report",
-                pdf_bytes,
                 f"{disease_name}_Report.pdf",
-                "application/pdf"
+                username=st.session_state['current_user'],
+                disease=disease_name,
+                result_text=result_text,
+                factors=factors
             )
 
+            what_if_panel(model_name, inputs)
+
             # Appointment + Hospitals
             appointment_booking(disease_name)
             show_hospitals(disease_name)
@@ -186,78 +225,144 @@ def disease_page(disease_name, model_loader, input_func):
 
     st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
 
-def heart_inputs():
-    age = st.number_input("Age",0,120,52)
-    sex = st.selectbox("Sex (0=F,1=M)",[0,1])
-    cp = st.number_input("Chest Pain Type",0,3,0)
-    trestbps = st.number_input("BP",80,200,120)
-    chol = st.number_input("Cholesterol",100,600,240)
-    fbs = st.selectbox("FBS > 120",[0,1])
-    restecg = st.number_input("Rest ECG",0,2,1)
-    thalach = st.number_input("Max HR",60,250,150)
-    exang = st.selectbox("Exercise angina",[0,1])
-    oldpeak = st.number_input("ST Depression",0.0,10.0,1.2)
-    slope = st.number_input("Slope ST",0,2,1)
-    ca = st.number_input("Vessels colored",0,3,0)
-    thal = st.number_input("Thalassemia",1,3,2)
-    return [age,sex,cp,trestbps,chol,fbs,restecg,thalach,exang,oldpeak,slope,ca,thal]
-
-def diabetes_inputs():
-    preg = st.number_input("Pregnancies",0,20,2)
-    glucose = st.number_input("Glucose",0,300,120)
-    bp = st.number_input("BP",0,200,70)
-    skin = st.number_input("Skin Thickness",0,100,20)
-    insulin = st.number_input("Insulin",0,900,85)
-    bmi = st.number_input("BMI",0.0,70.0,28.5)
-    dpf = st.number_input("DPF",0.0,3.0,0.5)
-    age = st.number_input("Age",1,120,32)
-    return [preg,glucose,bp,skin,insulin,bmi,dpf,age]
-
-def kidney_inputs():
-    age = st.number_input("Age",0,120,45)
-    bp = st.number_input("Blood Pressure",0,200,80)
-    sg = st.number_input("Specific Gravity",1.0,1.05,1.02)
-    al = st.number_input("Albumin",0,5,0)
-    su = st.number_input("Sugar",0,5,0)
-    bgr = st.number_input("Blood Glucose Random",0,500,110)
-    bu = st.number_input("Blood Urea",0,200,25)
-    sc = st.number_input("Serum Creatinine",0.0,20.0,1.0)
-    hemo = st.number_input("Hemoglobin",0.0,20.0,15.2)
-    pcv = st.number_input("Packed Cell Volume",0,60,44)
-    return [age,bp,sg,al,su,bgr,bu,sc,hemo,pcv]
-
-def liver_inputs():
-    age = st.number_input("Age",1,120,45)
-    gender = st.selectbox("Gender",["Male","Female"])
-    gender_val = 1 if gender=="Male" else 0
-    total_bilirubin = st.number_input("Total Bilirubin",0.0,10.0,1.3)
-    direct_bilirubin = st.number_input("Direct Bilirubin",0.0,5.0,0.4)
-    alk_phos = st.number_input("Alkaline Phosphotase",50,2000,210)
-    alt = st.number_input("ALT",1,2000,35)
-    ast = st.number_input("AST",1,2000,40)
-    total_proteins = st.number_input("Total Proteins",1.0,10.0,6.8)
-    albumin = st.number_input("Albumin",1.0,6.0,3.1)
-    ag_ratio = st.number_input("Albumin/Globulin Ratio",0.0,3.0,0.9)
-    return [age,gender_val,total_bilirubin,direct_bilirubin,alk_phos,alt,ast,total_proteins,albumin,ag_ratio]
+@st.fragment
+def what_if_panel(model_name, inputs):
+    # Risk curve (one value) or heatmap (two values) around this patient;
+    # the whole grid is scored in one call
+    import pandas as pd
+    from diagnostics.whatif import WHATIF_GRID_POINTS, WHATIF_HEATMAP_POINTS, risk_scores, what_if
+    spec = MODEL_SPECS[model_name]
+    labels = [label for label, _, _ in spec['inputs']]
+    st.subheader("🔬 What-if")
+    chosen = st.multiselect("Vary one or two values", labels, max_selections=2, key=f"{model_name}_whatif")
+    if not chosen:
+        st.caption("Pick a value to see how the predicted risk changes across its range.")
+        return
+
+    bundle = get_model(model_name)
+    columns = [labels.index(label) for label in chosen]
+    ranges = [spec['inputs'][c][1:] for c in columns]
+    points = WHATIF_GRID_POINTS if len(columns) == 1 else WHATIF_HEATMAP_POINTS
+    grids, risk = what_if(bundle, inputs, columns, ranges, points)
+    current = risk_scores(bundle.model, bundle.scaler, np.reshape(inputs, (1, -1)))[0]
+
+    if len(columns) == 1:
+        st.line_chart(pd.DataFrame({chosen[0]: grids[0], "Risk": risk}).set_index(chosen[0]))
+    else:
+        x, y = np.meshgrid(*grids, indexing="ij")
+        st.vega_lite_chart(pd.DataFrame({"x": x.ravel(), "y": y.ravel(), "risk": risk.ravel()}), {
+            "mark": "rect",
+            "encoding": {
+                "x": {"field": "x", "type": "ordinal", "title": chosen[0],
+                      "axis": {"format": ".4~g", "labelOverlap": True}},
+                "y": {"field": "y", "type": "ordinal", "title": chosen[1], "sort": "descending",
+                      "axis": {"format": ".4~g", "labelOverlap": True}},
+                "color": {"field": "risk", "type": "quantitative", "title": "Risk",
+                          "scale": {"domain": [0, 1], "scheme": "reds"}},
+                "tooltip": [{"field": "x", "title": chosen[0]}, {"field": "y", "title": chosen[1]},
+                            {"field": "risk", "title": "Risk", "format": ".0%"}],
+            },
+        })
+    st.caption(f"Current risk {current:.0%} · {risk.size} scenarios scored in one call")
+
+def spec_inputs(model_name):
+    # The form is MODEL_SPECS[...]["inputs"], in the model's feature order
+    spec = MODEL_SPECS[model_name]
+    return [
+        spec_field(label, low, high, default, f"{model_name}_{j}")
+        for j, ((label, low, high), default) in enumerate(zip(spec['inputs'], spec['defaults']))
+    ]
 
-# ===================== BRAIN TUMOR PREDICTION PAGE =====================
-@st.cache_resource
-@st.cache_resource
-def load_brain_model():
-    FILE_ID = "1r7Kmf14ZGKQK3GSTk3nxPxfAyGpg2m_b"
-    URL = f"https://drive.google.com/uc?id={FILE_ID}"
+def spec_field(label, low, high, default, key):
+    if (low, high) == (0, 1):
+        return st.selectbox(label, [0, 1], index=default, key=key)
+    return st.number_input(label, low, high, default, key=key)
 
-    response = requests.get(URL)
-    with open("brain_tumor_model.h5", "wb") as f:
-        f.write(response.content)
+# ===================== COMBINED SCREENING =====================
+def screening_page():
+    from diagnostics.screening import report_factors, report_text, screen
+    st.header("🩺 Full Screening")
+    st.caption("Shared values are asked once; the heart, diabetes, kidney and liver models run together.")
 
-    return load_model("brain_tumor_model.h5")
+    with st.form("screening_form"):
+        values = screening_inputs()
+        submitted = st.form_submit_button("🔍 Screen All")
 
+    if submitted:
+        try:
+            results = screen(values)
+            username = st.session_state['current_user']
+            with timed("store_write"):
+                for r in results:
+                    get_store().add_prediction(username, r['disease'], r['result'], r['row'])
+
+            st.subheader("Results")
+            for r in results:
+                (st.error if r['detected'] else st.success)(r['result'])
+                if r['factors']:
+                    with st.expander(f"Main factors: {r['disease']}"):
+                        st.markdown("\n".join(f"- {line}" for line in r['factors']))
+
+            pdf_download_button(
+                "📄 Download Combined PDF Report",
+                "Screening_Report.pdf",
+                username=username,
+                disease="Multi-Disease Screening",
+                result_text=report_text(results),
+                factors=report_factors(results)
+            )
 
+            flagged = [r['disease'] for r in results if r['detected']]
+            if flagged:
+                screening_consultation(flagged)
+
+        except Exception as e:
+            st.error("Screening failed ❌")
+            st.code(str(e))
+
+    st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+
+@st.fragment
+def screening_consultation(flagged):
+    # Switching disease reruns only this block, so the results stay on screen
+    disease = st.selectbox("Book a consultation for", flagged, key="screening_consult")
+    appointment_booking(disease)
+    show_hospitals(disease)
+
+def screening_inputs():
+    # Shared values first, then one column of model-specific values per disease
+    from diagnostics.screening import SCREENING_MODELS, SHARED_INPUTS, own_inputs
+    values = {}
+    st.markdown("**Shared**")
+    for column, (key, (label, low, high, default)) in zip(st.columns(len(SHARED_INPUTS)), SHARED_INPUTS.items()):
+        with column:
+            values[key] = spec_field(label, low, high, default, f"screening_{key}")
+    for column, name in zip(st.columns(len(SCREENING_MODELS)), SCREENING_MODELS):
+        with column:
+            st.markdown(f"**{MODEL_SPECS[name]['disease']}**")
+            for j, label, low, high, default in own_inputs(name):
+                values[(name, j)] = spec_field(label, low, high, default, f"screening_{name}_{j}")
+    return values
+
+# ===================== BRAIN TUMOR PREDICTION PAGE =====================
 def brain_tumor_page():
     st.header("🧠 Brain Tumor Detection")
+    brain_view()
+    st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+
+@st.fragment
+def brain_view():
+    # Uploads, runtime/mode switches and Predict rerun only this view
+    from diagnostics.batching import BatcherOverloaded, get_brain_batcher
+    from diagnostics.brain import decode_image, preprocess_upload
+    from diagnostics.reports import REPORT_IMAGE_MAX_SIDE
+    runtime = brain_runtime_selector()
+    model = get_brain_model(runtime)
 
-    model = load_brain_model()
+    mode = st.radio("Mode", ["Single Image", "MRI Study (multiple slices)"], horizontal=True)
+    if mode != "Single Image":
+        brain_study_section(model)
+        return
 
     uploaded_file = st.file_uploader(
         "Upload Brain MRI Image",
@@ -265,59 +370,132 @@ def brain_tumor_page():
     )
 
     if uploaded_file is not None:
-        image = Image.open(uploaded_file).convert("RGB")
-        st.image(image, caption="Uploaded MRI", use_column_width=True)
+        data = uploaded_file.getvalue()
+        st.image(data, caption="Uploaded MRI", width="stretch")
 
         input_shape = model.input_shape[1:]
 
-        # Preprocess
-        if len(input_shape) == 1:
-            side = int(np.sqrt(input_shape[0] / 3))
-            img = image.resize((side, side))
-            img_array = np.array(img) / 255.0
-            img_array = img_array.flatten().reshape(1, -1)
-
-        elif input_shape[-1] == 1:
-            img = image.resize((input_shape[0], input_shape[1])).convert("L")
-            img_array = np.array(img) / 255.0
-            img_array = img_array.reshape(1, input_shape[0], input_shape[1], 1)
-
-        else:
-            img = image.resize((input_shape[0], input_shape[1]))
-            img_array = np.array(img) / 255.0
-            img_array = img_array.reshape(1, input_shape[0], input_shape[1], 3)
+        # Preprocess (decoded once per upload; reruns hit the content-hash cache)
+        with timed("preprocess", model="brain"):
+            img_array = preprocess_upload(data, input_shape)
 
         if st.button("🔍 Predict Brain Tumor"):
-            prediction = model.predict(img_array)
-
-            if prediction[0][0] > 0.5:
+            # Concurrent sessions share one forward pass through the micro-batcher
+            try:
+                with timed("model_predict", model="brain"):
+                    probability = get_brain_batcher(runtime).predict(img_array)
+            except BatcherOverloaded:
+                st.error("The server is busy, please try again in a moment")
+                return
+            inc("predictions_total", disease="Brain Tumor")
+
+            if probability > 0.5:
                 result_text = "⚠️ Brain Tumor Detected"
                 st.error(result_text)
             else:
                 result_text = "✅ No Brain Tumor Detected"
                 st.success(result_text)
+            with timed("store_write"):
+                get_store().add_prediction(st.session_state['current_user'], "Brain Tumor", result_text)
 
-            # PDF
-            pdf_bytes = create_pdf(
+            # PDF (built only when the button is clicked)
+            pdf_download_button(
+                "📄 Download Brain Tumor Report",
+                "Brain_Tumor_Report.pdf",
                 username=st.session_state['current_user'],
                 disease="Brain Tumor",
                 result_text=result_text,
-                image=image
-            )
-
-            st.download_button(
-                "📄 Download Brain Tumor Report",
-                pdf_bytes,
-                file_name="Brain_Tumor_Report.pdf",
-                mime="application/pdf"
+                image=decode_image(data, (REPORT_IMAGE_MAX_SIDE, REPORT_IMAGE_MAX_SIDE))
             )
 
             appointment_booking("Brain Tumor")
             show_hospitals("Brain Tumor")
 
-    st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+def brain_runtime_selector():
+    # The quantized TFLite runtime is offered once scripts/convert_brain_tflite.py has been run
+    if not brain_tflite_available():
+        return "keras"
+    return st.radio(
+        "Runtime", ["keras", "tflite"],
+        index=1 if DEFAULT_BRAIN_RUNTIME == "tflite" else 0,
+        format_func=lambda r: "TFLite (quantized)" if r == "tflite" else "Keras",
+        horizontal=True
+    )
+
+def brain_study_section(model):
+    from diagnostics.brain import (DEFAULT_BATCH_SIZE, iter_uploaded_images,
+                                   predict_images, preprocess_images, summarize)
+    from diagnostics.reports import render_reports_zip
+    source = st.radio("Upload as", ["Images", "Zip archive", "Folder"], horizontal=True)
+    if source == "Images":
+        files = st.file_uploader("Upload MRI slices", type=["jpg", "jpeg", "png"], accept_multiple_files=True)
+    elif source == "Zip archive":
+        archive = st.file_uploader("Upload a zip of MRI slices", type=["zip"])
+        files = [archive] if archive is not None else []
+    else:
+        files = st.file_uploader("Upload a folder of MRI slices", type=["jpg", "jpeg", "png"], accept_multiple_files="directory")
+    batch_size = st.slider("Batch size", 1, 128, DEFAULT_BATCH_SIZE)
+
+    if files and st.button("🔍 Predict Study"):
+        names, images = [], []
+        for name, image in iter_uploaded_images(files):
+            names.append(name)
+            images.append(image)
+        if not images:
+            st.error("No JPG/PNG images found in the upload")
+            return
+
+        with timed("preprocess", model="brain"):
+            batch = preprocess_images(images, model.input_shape[1:])
+        with timed("model_predict", model="brain"):
+            probs = predict_images(model, batch, batch_size=batch_size)
+        inc("predictions_total", disease="Brain Tumor (MRI Study)")
+        rows, aggregate = summarize(names, probs)
+
+        st.dataframe(rows, width="stretch")
+        if aggregate["tumor_detected"]:
+            result_text = f"⚠️ Brain Tumor Detected in {aggregate['positive_images']} of {aggregate['images']} images"
+            st.error(result_text)
+        else:
+            result_text = f"✅ No Brain Tumor Detected in {aggregate['images']} images"
+            st.success(result_text)
+        st.caption(f"Max probability {aggregate['max_probability']}, mean {aggregate['mean_probability']}")
+        get_store().add_prediction(st.session_state['current_user'], "Brain Tumor (MRI Study)", result_text, aggregate)
+
+        username = st.session_state['current_user']
+        pdf_download_button(
+            "📄 Download Study Report",
+            "Brain_Tumor_Study_Report.pdf",
+            username=username,
+            disease="Brain Tumor (MRI Study)",
+            result_text=result_text + "\n\n" + "\n".join(
+                f"{r['image']}: {r['result']} ({r['tumor_probability']})" for r in rows
+            )
+        )
+        st.download_button(
+            "🗂️ Download Per-Image Reports (zip)",
+            lambda: render_reports_zip([
+                {
+                    "file_name": f"{i:03d}_Brain_Tumor_Report.pdf",
+                    "username": username,
+                    "disease": "Brain Tumor",
+                    "result_text": f"{row['image']}: {row['result']} (probability {row['tumor_probability']})",
+                    "image": image,
+                }
+                for i, (row, image) in enumerate(zip(rows, images))
+            ]),
+            file_name="Brain_Tumor_Reports.zip",
+            mime="application/zip",
+            on_click="ignore"
+        )
+
+        appointment_booking("Brain Tumor")
+        show_hospitals("Brain Tumor")
 
 # ===================== APPOINTMENTS =====================
+# A fragment, so Save Appointment and paging work from inside a prediction
+# result without rerunning (and losing) the prediction
+@st.fragment
 def appointment_booking(disease):
     st.subheader("📅 Doctor Consultation")
     doctor_map = {
@@ -333,15 +511,25 @@ def appointment_booking(disease):
     st.markdown(f"🔗 **Online Consultation:** [Book Appointment]({link})")
 
     username = st.session_state['current_user']
-    if username not in st.session_state['appointments']:
-        st.session_state['appointments'][username] = []
+    store = get_store()
     if st.button("✅ Save Appointment"):
-        st.session_state['appointments'][username].append({"disease":disease,"doctor":doctor,"link":link,"time":str(datetime.now())})
+        store.add_appointment(username, disease, doctor, link)
         st.success("Appointment added to history!")
-    if st.session_state['appointments'].get(username):
+    total = store.count_appointments(username)
+    if total:
         st.subheader("📋 Appointment History")
-        for appt in st.session_state['appointments'][username]:
-            st.write(f"- **{appt['disease']}** with {appt['doctor']} ➡️ [Link]({appt['link']}) (Saved: {appt['time']})")
+        paginated_history(
+            "appointments", total,
+            lambda offset: store.appointments(username, PAGE_SIZE, offset),
+            lambda appt: f"- **{appt['disease']}** with {appt['doctor']} ➡️ [Link]({appt['link']}) (Saved: {appt['created_at']})"
+        )
+
+def paginated_history(key, total, fetch_page, format_row):
+    # One markdown block per page instead of one element per saved entry
+    pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    page = st.number_input(f"Page (of {pages})", 1, pages, 1, key=f"{key}_page") if pages > 1 else 1
+    rows = fetch_page((page - 1) * PAGE_SIZE)
+    st.markdown("\n".join(format_row(row) for row in rows))
 def show_hospitals(disease):
     st.subheader("🏥 Nearby Hospitals / Clinics")
     search_map = {
@@ -357,23 +545,97 @@ def show_hospitals(disease):
 # ===================== SPEECH TO TEXT =====================
 def speech_to_text_page():
     st.header("🎙️ Speech to Text")
+    speech_view()
+
+@st.fragment
+def speech_view():
+    from diagnostics.speech import (BACKENDS, AudioTooLargeError, TranscriptionError,
+                                    get_backend, join_transcript, read_wav,
+                                    split_on_silence, transcribe_chunks)
+    backends = list(BACKENDS)
+    default = os.environ.get("SPEECH_BACKEND", "google")
+    backend_name = st.selectbox("Engine", backends, index=backends.index(default) if default in backends else 0)
     audio_file = st.file_uploader("Upload WAV file", type=["wav"])
     if audio_file:
-        recognizer = sr.Recognizer()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            f.write(audio_file.read())
-            file_path = f.name
-        with sr.AudioFile(file_path) as source:
-            audio = recognizer.record(source)
-        try:
-            text = recognizer.recognize_google(audio)
+        # Reruns reuse the transcript of an upload that was already processed
+        cache_key = (audio_file.file_id, backend_name)
+        if st.session_state.get('transcript_key') == cache_key:
             st.success("Recognized Text:")
-            st.text_area("Result", text, height=150)
-        except sr.UnknownValueError:
+            st.text_area("Result", st.session_state['transcript'], height=150)
+            return
+        try:
+            with timed("audio_decode"):
+                samples, rate = read_wav(audio_file)
+        except (AudioTooLargeError, ValueError, EOFError) as e:
+            st.error(f"Could not read audio: {e}")
+            return
+
+        with timed("audio_split"):
+            chunks = split_on_silence(samples, rate)
+        progress = st.progress(0.0, text=f"Transcribing {len(chunks)} chunk(s)...")
+        partial = st.empty()
+        parts = {}
+        try:
+            with timed("transcribe", backend=backend_name):
+                for index, total, text in transcribe_chunks(samples, rate, get_backend(backend_name), chunks):
+                    parts[index] = text
+                    progress.progress(len(parts) / total, text=f"Transcribed {len(parts)} of {total} chunk(s)")
+                    partial.text_area("Partial transcript", join_transcript(parts), height=150)
+        except (TranscriptionError, ImportError) as e:
+            st.error(str(e))
+            return
+        progress.empty()
+        partial.empty()
+
+        text = join_transcript(parts)
+        if not text:
             st.error("Could not understand audio")
-        except sr.RequestError as e:
-            st.error(f"API Error: {e}")
-            
+            return
+        st.session_state['transcript_key'] = cache_key
+        st.session_state['transcript'] = text
+        st.success("Recognized Text:")
+        st.text_area("Result", text, height=150)
+
+
+# ===================== ADMIN METRICS =====================
+def metrics_page():
+    from diagnostics.metrics import batcher_stats, cache_stats, metrics
+    from diagnostics.registry import memory_report
+    st.header("📊 Metrics")
+    if not is_admin(st.session_state['current_user']):
+        st.error("Admins only")
+        st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+        return
+
+    report = memory_report()
+    st.metric("Process RSS", f"{report['process_rss_bytes'] / 2**20:.1f} MB")
+
+    st.subheader("⏱️ Stage Latency")
+    stages = metrics.stages()
+    if stages:
+        st.dataframe(stages, width="stretch")
+    else:
+        st.info("No requests recorded yet")
+
+    st.subheader("🗃️ Caches")
+    caches = [{"cache": name, **stats} for name, stats in sorted(cache_stats().items())]
+    if caches:
+        st.dataframe(caches, width="stretch")
+
+    batchers = [{"batcher": name, **stats} for name, stats in sorted(batcher_stats().items())]
+    if batchers:
+        st.subheader("📦 Micro-batchers")
+        st.dataframe(batchers, width="stretch")
+
+    st.subheader("🧠 Models")
+    models = [{"model": name, **info} for name, info in sorted(report['models'].items())]
+    if models:
+        st.dataframe(models, width="stretch")
+
+    st.download_button("⬇️ Prometheus metrics", metrics.render, file_name="metrics.prom",
+                       mime="text/plain", on_click="ignore")
+    st.caption("Set METRICS_PORT to serve /metrics and /readyz over HTTP or METRICS_FILE to write this text periodically.")
+    st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
 
 
 # ===================== MAIN =====================
@@ -384,14 +646,18 @@ elif st.session_state['page'] == 'Login':
 elif st.session_state['page'] == 'Home':
     home_dashboard()
 elif st.session_state['page']=="Heart":
-    disease_page("Heart Disease", lambda: load_pickle_model("models/heart_model.pkl"), heart_inputs)
+    disease_page("Heart Disease", "heart")
 elif st.session_state['page']=="Diabetes":
-    disease_page("Diabetes", lambda: load_pickle_model("models/diabetes_model.pkl"), diabetes_inputs)
+    disease_page("Diabetes", "diabetes")
 elif st.session_state['page']=="Kidney":
-    disease_page("Kidney Disease", lambda: load_pickle_model("models/kidney_10f_model.pkl"), kidney_inputs)
+    disease_page("Kidney Disease", "kidney")
 elif st.session_state['page']=="Liver":
-    disease_page("Liver Disease", lambda: load_pickle_model("models/liver_model.pkl"), liver_inputs)
+    disease_page("Liver Disease", "liver")
+elif st.session_state['page']=="Screening":
+    screening_page()
 elif st.session_state['page'] == "Brain":
     brain_tumor_page()
 elif st.session_state['page']=="Speech":
     speech_to_text_page()
+elif st.session_state['page']=="Metrics":
+    metrics_page()
@@ -0,0 +1 @@
+# Micro-benchmarks for the diagnostic hot paths; run with `python -m benchmarks.run`
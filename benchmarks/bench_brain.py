@@ -0,0 +1,72 @@
+import io
+
+import numpy as np
+
+from diagnostics.brain import preprocess_cache, preprocess_image, preprocess_images, preprocess_upload
+
+# Brain MRI path: preprocessing for each input_shape layout brain_tumor_page
+# handles, the cached upload path (reduced-size JPEG decode) and predict on a
+# small synthetic Keras CNN standing in for the downloaded model (skipped when
+# TensorFlow isn't installed).
+
+INPUT_SHAPES = {
+    "rgb": (150, 150, 3),
+    "gray": (128, 128, 1),
+    "flat": (64 * 64 * 3,),
+}
+STUDY_SLICES = 32
+
+
+def _mri_like(seed=0, size=512):
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+
+
+def _jpeg_bytes(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def _synthetic_model(input_shape):
+    from tensorflow import keras
+    model = keras.Sequential([
+        keras.Input(shape=input_shape),
+        keras.layers.Conv2D(8, 3, activation="relu"),
+        keras.layers.MaxPooling2D(4),
+        keras.layers.Conv2D(16, 3, activation="relu"),
+        keras.layers.GlobalAveragePooling2D(),
+        keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    model.predict(np.zeros((1,) + input_shape, dtype=np.float32), verbose=0)
+    return model
+
+
+def benchmarks():
+    image = _mri_like()
+    study = [_mri_like(seed) for seed in range(STUDY_SLICES)]
+    for layout, shape in INPUT_SHAPES.items():
+        yield f"brain.preprocess.{layout}", "time", lambda shape=shape: preprocess_image(image, shape)
+        yield (f"brain.preprocess.{layout}.study{STUDY_SLICES}", "time",
+               lambda shape=shape: preprocess_images(study, shape))
+
+    jpeg = _jpeg_bytes(_mri_like(size=2048))
+
+    def cold(shape):
+        preprocess_cache.clear()
+        return preprocess_upload(jpeg, shape)
+
+    yield "brain.preprocess.upload.jpeg2048.cold", "time", lambda: cold(INPUT_SHAPES["rgb"])
+    yield "brain.preprocess.upload.jpeg2048.cached", "time", lambda: preprocess_upload(jpeg, INPUT_SHAPES["rgb"])
+
+    try:
+        model = _synthetic_model(INPUT_SHAPES["rgb"])
+    except ImportError:
+        yield "brain.predict.keras", "skip", "TensorFlow is not installed"
+        return
+    single = preprocess_image(image, INPUT_SHAPES["rgb"])[np.newaxis]
+    batch = preprocess_images(study, INPUT_SHAPES["rgb"])
+    yield "brain.predict.keras.single", "time", lambda: model.predict(single, verbose=0)
+    yield (f"brain.predict.keras.study{STUDY_SLICES}", "time",
+           lambda: model.predict(batch, batch_size=16, verbose=0))
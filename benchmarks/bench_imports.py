@@ -0,0 +1,20 @@
+import importlib.util
+import os
+
+# Import time of app.py on the Signup/Login path, measured in a fresh
+# interpreter by scripts/check_import_time.py.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _check_import_time():
+    path = os.path.join(ROOT, "scripts", "check_import_time.py")
+    spec = importlib.util.spec_from_file_location("check_import_time", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def benchmarks():
+    measure = _check_import_time().measure
+    yield "import.app", "track", lambda: measure()[0] / 1000
@@ -0,0 +1,72 @@
+import os
+import warnings
+
+import numpy as np
+
+from diagnostics import registry
+from diagnostics.explain import attributions, explain_cache
+from diagnostics.fused import load_fused, load_mmap
+from diagnostics.whatif import WHATIF_GRID_POINTS, WHATIF_HEATMAP_POINTS, what_if, whatif_cache
+
+# Tabular models: registry loads (cold = straight from disk, warm = cached),
+# memory-mapped (and, if exported, .npz) loads, and scaler + predict latency for
+# one row and for a 1000-row batch. "sklearn" entries use the pickled
+# pipeline; the others use whatever get_model serves (the fused export when
+# present). What-if entries score a risk curve over one input and a heatmap
+# over two for a single patient, bypassing the what-if cache.
+
+BATCH_ROWS = 1000
+
+# The pickled scalers were fitted on DataFrames; plain arrays are intentional here
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def _sample_rows(name, n, seed=0):
+    # Plausible inputs drawn around the training distribution of the scaler
+    scaler = registry._load_pickle_bundle(name).scaler
+    rng = np.random.default_rng(seed)
+    return rng.normal(scaler.mean_, scaler.scale_, size=(n, len(scaler.mean_)))
+
+
+def _predict(bundle, X):
+    return lambda: bundle.model.predict(bundle.scaler.transform(X))
+
+
+def _what_if(bundle, row, columns, points):
+    ranges = [registry.MODEL_SPECS[bundle.name]["inputs"][c][1:] for c in columns]
+
+    def run():
+        whatif_cache.clear()
+        return what_if(bundle, row, columns, ranges, points)
+    return run
+
+
+def _explain(bundle, row):
+    def run():
+        explain_cache.clear()
+        return attributions(bundle, row)
+    return run
+
+
+def benchmarks():
+    for name in registry.MODEL_SPECS:
+        yield f"load.{name}.pickle.cold", "time", lambda name=name: registry._load_pickle_bundle(name)
+        yield f"load.{name}.fused.cold", "time", lambda name=name: registry._load_fused_bundle(name)
+        if os.path.exists(registry.fused_path(name)):
+            # Only written on request (export_fused_models.py --format npz)
+            yield f"load.{name}.npz.cold", "time", lambda name=name: load_fused(registry.fused_path(name))
+        yield f"load.{name}.mmap.cold", "time", lambda name=name: load_mmap(registry.mmap_path(name))
+        registry.get_model(name)
+        yield f"load.{name}.warm", "time", lambda name=name: registry.get_model(name)
+
+        rows = _sample_rows(name, BATCH_ROWS)
+        served = registry.get_model(name)
+        pickled = registry._load_pickle_bundle(name)
+        yield f"predict.{name}.single", "time", _predict(served, rows[:1])
+        yield f"predict.{name}.batch{BATCH_ROWS}", "time", _predict(served, rows)
+        yield f"predict.{name}.sklearn.single", "time", _predict(pickled, rows[:1])
+        yield f"predict.{name}.sklearn.batch{BATCH_ROWS}", "time", _predict(pickled, rows)
+        yield f"whatif.{name}.curve{WHATIF_GRID_POINTS}", "time", _what_if(served, rows[0], [1], WHATIF_GRID_POINTS)
+        yield (f"whatif.{name}.heatmap{WHATIF_HEATMAP_POINTS}x{WHATIF_HEATMAP_POINTS}", "time",
+               _what_if(served, rows[0], [1, 2], WHATIF_HEATMAP_POINTS))
+        yield f"explain.{name}.occlusion", "time", _explain(served, rows[0])
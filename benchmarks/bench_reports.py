@@ -0,0 +1,15 @@
+import numpy as np
+
+from diagnostics.reports import create_pdf
+
+# PDF reports with and without an embedded MRI image.
+
+RESULT_TEXT = "Tumor Detected ⚠️ (Probability: 0.91)"
+
+
+def benchmarks():
+    from PIL import Image
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (1024, 1024, 3), dtype=np.uint8))
+    yield "report.text", "time", lambda: create_pdf("bench", "Heart Disease", RESULT_TEXT)
+    yield "report.image", "time", lambda: create_pdf("bench", "Brain Tumor", RESULT_TEXT, image)
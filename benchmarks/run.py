@@ -0,0 +1,138 @@
+"""Run the micro-benchmarks and compare against the previous commit's results.
+
+    python -m benchmarks.run [--filter PATTERN] [--repeat 5] [--threshold 0.2]
+                             [--no-save] [--fail-on-regression]
+
+Every ``benchmarks/bench_*.py`` module exposes ``benchmarks()``, which yields
+``(name, kind, fn)`` entries in the style of asv:
+
+  * ``time``  - ``fn`` is timed with timeit's autorange; the best of
+    ``--repeat`` samples is reported per call
+  * ``track`` - ``fn`` measures itself and returns a number of milliseconds
+  * ``skip``  - the benchmark can't run here; ``fn`` is the reason
+
+Results are written to ``benchmarks/results/<commit>.json`` (``-dirty`` when
+the tree has local changes; filtered reruns update that file) and each run is compared with the newest result
+file from a different commit. Anything slower by more than ``--threshold`` is
+reported as a regression.
+"""
+import argparse
+import fnmatch
+import glob
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def commit_id():
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    dirty = _git("status", "--porcelain", "--untracked-files=no")
+    return commit + "-dirty" if dirty else commit
+
+
+def discover(pattern):
+    for path in sorted(glob.glob(os.path.join(ROOT, "benchmarks", "bench_*.py"))):
+        module = importlib.import_module("benchmarks." + os.path.splitext(os.path.basename(path))[0])
+        for name, kind, fn in module.benchmarks():
+            if fnmatch.fnmatch(name, pattern):
+                yield name, kind, fn
+
+
+def measure(kind, fn, repeat):
+    if kind == "track":
+        samples = [fn() for _ in range(repeat)]
+    else:
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        samples = [t / number * 1000 for t in timer.repeat(repeat=repeat, number=number)]
+    samples.sort()
+    return {"kind": kind, "best_ms": samples[0], "median_ms": samples[len(samples) // 2], "samples": len(samples)}
+
+
+def previous_results(current):
+    candidates = []
+    for path in glob.glob(os.path.join(RESULTS_DIR, "*.json")):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("commit") != current:
+            candidates.append(data)
+    return max(candidates, key=lambda d: d.get("timestamp", 0)) if candidates else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="*", help="glob over benchmark names, e.g. 'predict.*'")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown that counts as a regression")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)  # model paths in the registry are relative to the repo root
+    commit = commit_id()
+    previous = previous_results(commit)
+    baseline = previous["results"] if previous else {}
+    if previous:
+        print(f"Comparing against {previous['commit']}")
+
+    results, regressions = {}, []
+    for name, kind, fn in discover(args.filter):
+        if kind == "skip":
+            print(f"{name:45s}  skipped: {fn}")
+            continue
+        try:
+            result = measure(kind, fn, args.repeat)
+        except Exception as e:
+            print(f"{name:45s}  failed: {e}")
+            continue
+        results[name] = result
+        line = f"{name:45s} {result['best_ms']:10.3f} ms"
+        if name in baseline:
+            ratio = result["best_ms"] / baseline[name]["best_ms"]
+            line += f"  {ratio:5.2f}x"
+            if ratio > 1 + args.threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if not args.no_save and results:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{commit}.json")
+        if os.path.exists(path):
+            # A filtered rerun on the same commit updates its entries only
+            with open(path) as f:
+                results = {**json.load(f)["results"], **results}
+        with open(path, "w") as f:
+            json.dump({
+                "commit": commit,
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"Saved {len(results)} results to {os.path.relpath(path, ROOT)}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): " + ", ".join(regressions))
+        return 1 if args.fail_on_regression else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
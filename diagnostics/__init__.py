@@ -0,0 +1 @@
+# Shared helpers for the Streamlit entry points (app.py and pages/*).
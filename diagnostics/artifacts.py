@@ -0,0 +1,122 @@
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+# ===================== ARTIFACT CACHE =====================
+# Large model files are downloaded once into models/ and reused on every
+# restart. Downloads stream to a temp file next to the target while hashing,
+# are checked against the expected SHA-256 and then renamed into place, so a
+# crash or a second replica never leaves a half-written model behind.
+
+CHUNK_SIZE = 1 << 20
+
+
+class ArtifactError(RuntimeError):
+    pass
+
+
+def sha256_file(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sidecar(path):
+    return path + ".sha256"
+
+
+def _read_sidecar(path):
+    try:
+        with open(_sidecar(path)) as f:
+            return f.read().split()[0].strip().lower()
+    except (OSError, IndexError):
+        return None
+
+
+@contextmanager
+def _file_lock(path):
+    # Serialises downloads between processes on one host; a no-op where fcntl is missing
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _iter_source(url, chunk_size, timeout):
+    parsed = urlparse(url)
+    if parsed.scheme in ("", "file"):
+        with open(url2pathname(parsed.path) if parsed.scheme else url, "rb") as f:
+            yield from iter(lambda: f.read(chunk_size), b"")
+        return
+
+    import requests
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        if "text/html" in response.headers.get("Content-Type", ""):
+            raise ArtifactError(f"{url} returned an HTML page instead of the artifact")
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+
+
+def _is_valid(path, expected):
+    if not os.path.exists(path):
+        return False
+    if expected is None:
+        return True
+    return sha256_file(path) == expected
+
+
+def fetch_artifact(url, path, sha256=None, chunk_size=CHUNK_SIZE, timeout=60):
+    """Return ``path``, downloading ``url`` into it first if needed.
+
+    The expected checksum is ``sha256`` or, failing that, the ``.sha256``
+    sidecar written by the previous successful download.
+    """
+    expected = (sha256 or _read_sidecar(path) or "").lower() or None
+    if _is_valid(path, expected):
+        return path
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with _file_lock(path):
+        # Another process may have finished the download while we waited
+        expected = (sha256 or _read_sidecar(path) or "").lower() or None
+        if _is_valid(path, expected):
+            return path
+
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in _iter_source(url, chunk_size, timeout):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            actual = digest.hexdigest()
+            if sha256 and actual != sha256.lower():
+                raise ArtifactError(f"Checksum mismatch for {url}: expected {sha256}, got {actual}")
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with open(_sidecar(path) + ".tmp", "w") as f:
+            f.write(f"{actual}  {os.path.basename(path)}\n")
+        os.replace(_sidecar(path) + ".tmp", _sidecar(path))
+    return path
+
@@ -0,0 +1,142 @@
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from diagnostics.rules import alert_text
+
+# ===================== BATCH SCORING =====================
+# Uploaded intake lists are read, scaled and predicted chunk by chunk and the
+# results are appended to a temp file, so memory stays flat however many rows
+# the file has. Rule-based alerts run over the same chunk as one vectorized
+# pass and take precedence over the model, as on the single-patient pages.
+
+CHUNK_ROWS = 5000
+RESULT_COLUMNS = ["prediction", "rule_alert", "result"]
+
+
+def _normalize(name):
+    return str(name).strip().lower()
+
+
+def read_table_chunks(file, filename, chunk_rows=CHUNK_ROWS):
+    # Unreadable uploads are raised as ValueError, which the page shows as an error
+    if filename.lower().endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        try:
+            parquet = pq.ParquetFile(file)
+            for batch in parquet.iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+        except (pa.ArrowException, OSError) as e:
+            raise ValueError(f"Could not read Parquet file: {e}") from e
+    else:
+        try:
+            yield from pd.read_csv(file, chunksize=chunk_rows)
+        except UnicodeDecodeError as e:
+            raise ValueError("Could not read CSV file: it is not UTF-8 encoded") from e
+
+
+def match_columns(columns, features):
+    # Map every model feature to an uploaded column (exact, then case-insensitive)
+    lookup = {_normalize(c): c for c in columns}
+    mapping, missing = {}, []
+    for feature in features:
+        if feature in columns:
+            mapping[feature] = feature
+        elif _normalize(feature) in lookup:
+            mapping[feature] = lookup[_normalize(feature)]
+        else:
+            missing.append(feature)
+    return mapping, missing
+
+
+def score_chunk(model, scaler, features, mapping, df, disease_name, rules=None):
+    X = np.empty((len(df), len(features)), dtype=np.float64)
+    for j, feature in enumerate(features):
+        X[:, j] = pd.to_numeric(df[mapping[feature]], errors="coerce").to_numpy(dtype=np.float64)
+
+    valid = ~np.isnan(X).any(axis=1)
+    predictions = np.full(len(df), None, dtype=object)
+    if valid.any():
+        X_scaled = scaler.transform(X[valid])
+        predictions[valid] = model.predict(X_scaled)
+
+    fired = rules.evaluate(X) if rules is not None else np.zeros((len(df), 0), dtype=bool)
+    alert = fired.any(axis=1)
+
+    out = df.copy()
+    out["prediction"] = predictions
+    out["rule_alert"] = rules.reasons(fired) if rules is not None else ""
+    out["result"] = np.where(
+        ~valid, "Invalid input",
+        np.where(alert, alert_text(disease_name),
+                 np.where(predictions == 1, f"{disease_name} Detected", f"No {disease_name} Detected")),
+    )
+    return out
+
+
+def score_file(model, scaler, features, file, filename, disease_name, chunk_rows=CHUNK_ROWS, rules=None):
+    out = tempfile.NamedTemporaryFile(mode="w+b", suffix=".csv")
+    summary = {"rows": 0, "detected": 0, "rule_alerts": 0, "invalid": 0}
+    mapping = None
+    for df in read_table_chunks(file, filename, chunk_rows):
+        if mapping is None:
+            mapping, missing = match_columns(list(df.columns), features)
+            if missing:
+                out.close()
+                raise ValueError("Missing columns: " + ", ".join(missing))
+        scored = score_chunk(model, scaler, features, mapping, df, disease_name, rules)
+        scored.to_csv(out, header=summary["rows"] == 0, index=False)
+        summary["rows"] += len(scored)
+        summary["detected"] += int((scored["result"] == f"{disease_name} Detected").sum())
+        summary["rule_alerts"] += int((scored["result"] == alert_text(disease_name)).sum())
+        summary["invalid"] += int((scored["result"] == "Invalid input").sum())
+    if mapping is None:
+        out.close()
+        raise ValueError("Uploaded file has no rows")
+    out.seek(0)
+    return out, summary
+
+
+def download_reader(file):
+    # Deferred data for st.download_button: every click gets its own reader over
+    # the result file, so the scored rows stay on disk instead of being held in
+    # the session. The file is closed (and deleted) once Streamlit drops the button.
+    def read():
+        file.flush()
+        return open(file.name, "rb")
+    weakref.finalize(read, file.close)
+    return read
+
+
+def batch_scoring_section(disease_name, model, scaler, features, rules=None):
+    st.subheader("📂 Batch Scoring")
+    st.caption("Expected columns: " + ", ".join(features))
+    uploaded = st.file_uploader(
+        "Upload CSV or Parquet file",
+        type=["csv", "parquet"],
+        key=f"batch_file_{disease_name}"
+    )
+    if uploaded is not None and st.button("▶️ Score File", key=f"batch_score_{disease_name}"):
+        try:
+            result_file, summary = score_file(
+                model, scaler, features, uploaded, uploaded.name, disease_name, rules=rules
+            )
+        except ValueError as e:
+            st.error(str(e))
+            return
+        st.success(
+            f"Scored {summary['rows']} rows: {summary['detected']} detected, "
+            f"{summary['rule_alerts']} rule-based alerts, {summary['invalid']} invalid"
+        )
+        st.download_button(
+            "📥 Download Results (CSV)",
+            download_reader(result_file),
+            f"{disease_name.replace(' ', '_')}_Batch_Results.csv",
+            "text/csv",
+            key=f"batch_download_{disease_name}",
+            on_click="ignore"
+        )
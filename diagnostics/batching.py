@@ -0,0 +1,155 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from diagnostics.metrics import inc, observe
+
+# ===================== MICRO-BATCHING =====================
+# Concurrent single-image requests against the shared brain model are
+# coalesced: callers enqueue one preprocessed sample, a worker thread groups
+# whatever arrives within max_wait_ms (up to max_batch_size) into one forward
+# pass and hands each caller its own row back. A bounded queue turns overload
+# into a fast BatcherOverloaded error instead of an ever-growing backlog.
+
+BRAIN_BATCH_MAX_SIZE = int(os.environ.get("BRAIN_BATCH_MAX_SIZE", "16"))
+BRAIN_BATCH_MAX_WAIT_MS = float(os.environ.get("BRAIN_BATCH_MAX_WAIT_MS", "5"))
+BRAIN_BATCH_MAX_QUEUE = int(os.environ.get("BRAIN_BATCH_MAX_QUEUE", "256"))
+# How long predict() waits for its row before giving up
+BRAIN_BATCH_TIMEOUT_S = float(os.environ.get("BRAIN_BATCH_TIMEOUT_S", "60"))
+
+
+class BatcherOverloaded(RuntimeError):
+    pass
+
+
+class BatcherTimeout(BatcherOverloaded):
+    pass
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=BRAIN_BATCH_MAX_SIZE,
+                 max_wait_ms=BRAIN_BATCH_MAX_WAIT_MS, max_queue=BRAIN_BATCH_MAX_QUEUE, name="batcher"):
+        # predict_fn takes a stacked batch and returns one output row per sample
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._worker = None
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, sample):
+        self._ensure_worker()
+        future = Future()
+        try:
+            self._queue.put_nowait((sample, future, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            inc("batcher_rejected_total", batcher=self.name)
+            raise BatcherOverloaded(f"{self.name} queue is full ({self._queue.maxsize} requests)") from None
+        with self._lock:
+            self.submitted += 1
+        return future
+
+    def predict(self, sample, timeout=BRAIN_BATCH_TIMEOUT_S):
+        try:
+            return self.submit(sample).result(timeout)
+        except TimeoutError:
+            raise BatcherTimeout(f"{self.name} gave no result within {timeout:g}s") from None
+
+    def _collect(self):
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                items.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            start = time.perf_counter()
+            for _, _, enqueued in items:
+                observe("batch_queue_wait", start - enqueued, batcher=self.name)
+            try:
+                outputs = self.predict_fn(np.stack([sample for sample, _, _ in items]))
+                if len(outputs) != len(items):
+                    # zip would leave the unmatched futures waiting forever
+                    raise RuntimeError(f"{self.name}: predict_fn returned {len(outputs)} rows for {len(items)} samples")
+            except Exception as e:
+                for _, future, _ in items:
+                    future.set_exception(e)
+                with self._lock:
+                    self.failed += len(items)
+                continue
+            observe("batch_predict", time.perf_counter() - start, batcher=self.name)
+            for (_, future, _), output in zip(items, outputs):
+                future.set_result(output)
+            with self._lock:
+                self.completed += len(items)
+                self.batches += 1
+                self.largest_batch = max(self.largest_batch, len(items))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "batches": self.batches,
+                "mean_batch_size": round(self.completed / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+            }
+
+
+# ===================== BRAIN MODEL BATCHERS =====================
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_brain_batcher(runtime=None):
+    # One batcher per runtime, wrapping the registry's shared model
+    from diagnostics.brain import predict_images
+    from diagnostics.registry import DEFAULT_BRAIN_RUNTIME, get_brain_model
+    runtime = runtime or DEFAULT_BRAIN_RUNTIME
+    # Loaded outside the lock; the registry serializes loads itself
+    model = get_brain_model(runtime)
+    with _batchers_lock:
+        batcher = _batchers.get(runtime)
+        if batcher is None:
+            batcher = MicroBatcher(
+                lambda batch: predict_images(model, batch, batch_size=len(batch)),
+                name=f"brain-{runtime}",
+            )
+            _batchers[runtime] = batcher
+        return batcher
+
+
+def batcher_stats():
+    with _batchers_lock:
+        return {b.name: b.stats() for b in _batchers.values()}
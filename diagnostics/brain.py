@@ -0,0 +1,203 @@
+import hashlib
+import io
+import os
+import threading
+import zipfile
+
+import numpy as np
+
+from diagnostics.cache import LRUCache
+
+# ===================== BRAIN MRI BATCHING =====================
+# A study of many slices is preprocessed into one stacked tensor and scored
+# with model.predict in configurable batch sizes instead of N batch-of-one
+# calls.
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+DEFAULT_BATCH_SIZE = 16
+THRESHOLD = 0.5
+
+
+def _to_float(pixels, out=None):
+    # uint8 pixels -> float32 in [0, 1], written straight into out when given
+    return np.divide(pixels, np.float32(255.0), out=out, dtype=np.float32)
+
+
+def _target_size(input_shape):
+    if len(input_shape) == 1:
+        side = int(np.sqrt(input_shape[0] / 3))
+        return side, side
+    return input_shape[0], input_shape[1]
+
+
+def preprocess_image(image, input_shape, out=None):
+    # Same three layouts brain_tumor_page has always supported; no batch axis
+    size = _target_size(input_shape)
+    if len(input_shape) == 1:
+        pixels = np.asarray(image.resize(size)).reshape(-1)
+    elif input_shape[-1] == 1:
+        pixels = np.asarray(image.resize(size).convert("L")).reshape(size[0], size[1], 1)
+    else:
+        pixels = np.asarray(image.resize(size)).reshape(size[0], size[1], 3)
+    return _to_float(pixels, out)
+
+
+def preprocess_images(images, input_shape):
+    batch = None
+    for i, image in enumerate(images):
+        if batch is None:
+            first = preprocess_image(image, input_shape)
+            batch = np.empty((len(images),) + first.shape, dtype=np.float32)
+            batch[0] = first
+        else:
+            preprocess_image(image, input_shape, out=batch[i])
+    return batch
+
+
+# ===================== CACHED UPLOAD PREPROCESSING =====================
+# Streamlit reruns the page on every interaction, so an upload's tensor is
+# cached on its content hash (shared by every session) and only computed
+# once. JPEGs are decoded at reduced size via DCT scaling when the model
+# input is much smaller than the scan. Cached tensors are read-only.
+
+BRAIN_PREPROCESS_CACHE_SIZE = int(os.environ.get("BRAIN_PREPROCESS_CACHE_SIZE", "64"))
+
+preprocess_cache = LRUCache(BRAIN_PREPROCESS_CACHE_SIZE)
+
+
+def decode_image(data, max_size=None):
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    if max_size and image.format == "JPEG":
+        # Picks the smallest 1/2, 1/4 or 1/8 scale still at least max_size
+        image.draft("RGB", max_size)
+    return image.convert("RGB")
+
+
+def preprocess_upload(data, input_shape):
+    input_shape = tuple(input_shape)
+    key = (hashlib.sha256(data).hexdigest(), input_shape)
+
+    def compute():
+        array = preprocess_image(decode_image(data, _target_size(input_shape)), input_shape)
+        array.flags.writeable = False
+        return array
+
+    return preprocess_cache.get_or_compute(key, compute)
+
+
+def _is_image_name(name):
+    base = os.path.basename(name)
+    return name.lower().endswith(IMAGE_EXTENSIONS) and not base.startswith(".") and "__MACOSX" not in name
+
+
+def iter_uploaded_images(files):
+    from PIL import Image
+    for f in files:
+        if f.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(f) as archive:
+                for member in sorted(archive.namelist()):
+                    if _is_image_name(member):
+                        with archive.open(member) as fh:
+                            yield member, Image.open(fh).convert("RGB")
+        elif _is_image_name(f.name):
+            yield f.name, Image.open(f).convert("RGB")
+
+
+def iter_image_dir(directory):
+    # Yields (relative name, image, label); label comes from yes/ or no/ folders
+    from PIL import Image
+    labels = {"yes": True, "tumor": True, "no": False, "no_tumor": False}
+    for root, _, filenames in sorted(os.walk(directory)):
+        label = labels.get(os.path.basename(root).lower())
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            if _is_image_name(path):
+                yield os.path.relpath(path, directory), Image.open(path).convert("RGB"), label
+
+
+def predict_images(model, batch, batch_size=DEFAULT_BATCH_SIZE):
+    probs = model.predict(batch, batch_size=batch_size, verbose=0)
+    return np.asarray(probs, dtype=np.float64).reshape(len(batch), -1)[:, 0]
+
+
+def summarize(names, probs, threshold=THRESHOLD):
+    rows = [
+        {
+            "image": name,
+            "tumor_probability": round(float(p), 4),
+            "result": "Tumor Detected" if p > threshold else "No Tumor",
+        }
+        for name, p in zip(names, probs)
+    ]
+    positives = int((probs > threshold).sum())
+    aggregate = {
+        "images": len(rows),
+        "positive_images": positives,
+        "max_probability": round(float(probs.max()), 4) if len(rows) else 0.0,
+        "mean_probability": round(float(probs.mean()), 4) if len(rows) else 0.0,
+        "tumor_detected": positives > 0,
+    }
+    return rows, aggregate
+
+
+# ===================== TFLITE RUNTIME =====================
+# Flat quantized model produced by scripts/convert_brain_tflite.py. It mimics
+# the bits of the Keras API the pages use (input_shape, predict) so either
+# runtime can be handed to the same code.
+
+def _load_interpreter(path, num_threads=None):
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+    return Interpreter(model_path=path, num_threads=num_threads)
+
+
+class TFLiteBrainModel:
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        # One interpreter is shared by every session; invoke() is not thread-safe
+        self._lock = threading.Lock()
+        self.interpreter = _load_interpreter(path, num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = (None,) + tuple(int(d) for d in self._input["shape"][1:])
+        self._batch = int(self._input["shape"][0])
+
+    def _resize(self, n):
+        if n != self._batch:
+            self.interpreter.resize_tensor_input(self._input["index"], [n] + list(self.input_shape[1:]))
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch = n
+
+    def _quantize(self, x):
+        dtype = self._input["dtype"]
+        scale, zero_point = self._input["quantization"]
+        if np.issubdtype(dtype, np.integer) and scale:
+            info = np.iinfo(dtype)
+            x = np.clip(np.round(x / scale + zero_point), info.min, info.max)
+        return x.astype(dtype)
+
+    def _dequantize(self, y):
+        scale, zero_point = self._output["quantization"]
+        if np.issubdtype(y.dtype, np.integer) and scale:
+            return (y.astype(np.float32) - zero_point) * scale
+        return y.astype(np.float32)
+
+    def predict(self, batch, batch_size=DEFAULT_BATCH_SIZE, verbose=0):
+        outputs = []
+        with self._lock:
+            for start in range(0, len(batch), batch_size):
+                chunk = batch[start:start + batch_size]
+                self._resize(len(chunk))
+                self.interpreter.set_tensor(self._input["index"], self._quantize(np.asarray(chunk, dtype=np.float32)))
+                self.interpreter.invoke()
+                outputs.append(self._dequantize(self.interpreter.get_tensor(self._output["index"])))
+        return np.concatenate(outputs, axis=0)
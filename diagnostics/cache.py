@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from diagnostics.metrics import timed
+
+# ===================== LRU / TTL CACHE =====================
+# Thread-safe bounded cache shared by every Streamlit session in the process.
+# Entries are evicted least-recently-used first once maxsize is reached and
+# expire ttl seconds after they were stored.
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, stored_at = entry
+                if self.ttl is None or self._clock() - stored_at < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# ===================== PREDICTION CACHE =====================
+# One cache per disease; keys carry the model version, so a retrained or
+# re-exported model never serves stale answers.
+
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "3600"))
+
+_prediction_caches = {}
+_caches_lock = threading.Lock()
+
+
+def prediction_cache(name):
+    with _caches_lock:
+        if name not in _prediction_caches:
+            _prediction_caches[name] = LRUCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+        return _prediction_caches[name]
+
+
+def feature_key(bundle, row):
+    return (bundle.version, tuple(float(v) for v in row))
+
+
+def cached_predict(bundle, row):
+    def compute():
+        X = np.asarray(row, dtype=np.float64).reshape(1, -1)
+        with timed("scaler_transform", model=bundle.name):
+            X = bundle.scaler.transform(X)
+        with timed("model_predict", model=bundle.name):
+            return bundle.model.predict(X)[0].item()
+    return prediction_cache(bundle.name).get_or_compute(feature_key(bundle, row), compute)
+
+
+def prediction_cache_stats():
+    with _caches_lock:
+        return {name: cache.stats() for name, cache in _prediction_caches.items()}
@@ -0,0 +1,226 @@
+import json
+import os
+import time
+import unicodedata
+
+from diagnostics.cache import LRUCache
+from diagnostics.metrics import inc, observe
+
+# ===================== CHAT BACKENDS =====================
+# The chatbot page talks to a backend that streams reply text for a list of
+# {"role": "user" | "assistant", "content": ...} messages. Gemini is the
+# production backend; HTTPChatBackend speaks a tiny NDJSON protocol so the page
+# can run against scripts/fake_chat_server.py without network access.
+
+GEMINI_MODEL = "models/gemini-2.0-flash"
+CHAT_BACKEND_URL = os.environ.get("CHAT_BACKEND_URL")
+
+
+class ChatBackend:
+    name = "base"
+
+    def stream(self, messages):
+        raise NotImplementedError
+
+
+class GeminiBackend(ChatBackend):
+    name = "gemini"
+
+    def __init__(self, api_key, model_name=GEMINI_MODEL):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def stream(self, messages):
+        contents = [
+            {"role": "model" if m["role"] == "assistant" else "user", "parts": [m["content"]]}
+            for m in messages
+        ]
+        for chunk in self.model.generate_content(contents, stream=True):
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+
+
+def _chunk_text(chunk):
+    # chunk.text raises ValueError on chunks without parts (safety-blocked or
+    # finish-only), which would discard the reply streamed so far
+    candidates = getattr(chunk, "candidates", None) or []
+    content = getattr(candidates[0], "content", None) if candidates else None
+    return "".join(getattr(part, "text", "") for part in getattr(content, "parts", None) or [])
+
+
+class HTTPChatBackend(ChatBackend):
+    # POST {"messages": [...]} -> newline-delimited {"text": "..."} objects
+    name = "http"
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+
+    def stream(self, messages):
+        import requests
+        with requests.post(self.url, json={"messages": messages}, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    text = json.loads(line).get("text", "")
+                    if text:
+                        yield text
+
+
+_backend = None
+
+
+def get_chat_backend(api_key=None):
+    # One backend per process, shared by every session
+    global _backend
+    if _backend is None:
+        _backend = HTTPChatBackend(CHAT_BACKEND_URL) if CHAT_BACKEND_URL else GeminiBackend(api_key)
+    return _backend
+
+
+# ===================== FAQ RESPONSE CACHE =====================
+# Opening questions don't depend on earlier turns, so common ones ("what are
+# the symptoms of diabetes?") are answered from a shared cache keyed on the
+# normalized question text instead of calling the model again.
+
+FAQ_CACHE_SIZE = int(os.environ.get("CHAT_FAQ_CACHE_SIZE", "512"))
+FAQ_CACHE_TTL = float(os.environ.get("CHAT_FAQ_CACHE_TTL", str(24 * 3600)))
+
+faq_cache = LRUCache(FAQ_CACHE_SIZE, FAQ_CACHE_TTL)
+
+
+def normalize_question(text):
+    # NFKC + casefold keeps non-English questions apart. Letters, digits and
+    # combining marks (Tamil/Devanagari vowel signs, which \w misses) stay;
+    # punctuation and symbols become spaces.
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join("".join(c if unicodedata.category(c)[0] in "LNM" else " " for c in text).split())
+
+
+def faq_key(text):
+    # None when normalizing would throw away most of the question (emoji,
+    # symbols, ...), so different questions can't collapse onto one answer
+    key = normalize_question(text)
+    kept = sum(not c.isspace() for c in key)
+    total = sum(not c.isspace() for c in text)
+    return key if key and kept * 2 >= total else None
+
+
+def cacheable(messages):
+    # Only a question asked with no earlier conversation is context-free
+    return len(messages) == 1 and messages[0]["role"] == "user"
+
+
+def stream_reply(backend, messages, collected):
+    """Yield reply chunks, appending them to ``collected``; cached FAQ answers
+    are yielded in one piece."""
+    key = faq_key(messages[-1]["content"]) if cacheable(messages) else None
+    if key:
+        cached = faq_cache.get(key)
+        if cached is not None:
+            collected.append(cached)
+            yield cached
+            return
+    start = time.perf_counter()
+    try:
+        for chunk in backend.stream(messages):
+            if not collected:
+                observe("chat_first_token", time.perf_counter() - start, backend=backend.name)
+            collected.append(chunk)
+            yield chunk
+    except Exception:
+        inc("stage_errors_total", stage="chat_reply", backend=backend.name)
+        raise
+    observe("chat_reply", time.perf_counter() - start, backend=backend.name)
+    if key and collected:
+        faq_cache.set(key, "".join(collected))
+
+
+# ===================== HISTORY MANAGEMENT =====================
+# Long conversations would otherwise re-send (and re-render) every turn. The
+# history keeps a bounded list of messages for display and sends the model a
+# context that fits a token budget: the most recent turns verbatim plus a
+# short extractive summary of the turns that were compacted away.
+
+HISTORY_TOKEN_BUDGET = int(os.environ.get("CHAT_HISTORY_TOKEN_BUDGET", "3000"))
+MAX_STORED_MESSAGES = int(os.environ.get("CHAT_MAX_STORED_MESSAGES", "200"))
+RENDER_WINDOW = 20
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting English text
+    return len(text) // 4 + 1
+
+
+def _clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+class ChatHistory:
+    def __init__(self, token_budget=HISTORY_TOKEN_BUDGET, max_stored=MAX_STORED_MESSAGES):
+        self.token_budget = token_budget
+        # A quarter of the budget is reserved for the summary of compacted turns
+        self.summary_budget = token_budget // 4
+        self.live_budget = token_budget - self.summary_budget
+        self.max_stored = max_stored
+        self.messages = []
+        self.summary_lines = []
+        self.dropped = 0          # messages no longer stored at all
+        self._first_live = 0      # index of the first message still sent verbatim
+
+    def append(self, role, content):
+        self.messages.append({"role": role, "content": content})
+        self._compact()
+
+    def discard_last(self):
+        # Remove the newest message, e.g. a question the backend failed to answer
+        self.messages.pop()
+        self._first_live = min(self._first_live, len(self.messages))
+
+    def _live_tokens(self):
+        return sum(estimate_tokens(m["content"]) for m in self.messages[self._first_live:])
+
+    def _exchange_end(self, start):
+        # A user turn and the replies that follow it, up to the next user turn
+        end = start + 1
+        while end < len(self.messages) and self.messages[end]["role"] != "user":
+            end += 1
+        return end
+
+    def _compact(self):
+        # Summarize the oldest verbatim exchanges until the rest fits the
+        # budget, always keeping the newest one. Whole exchanges go, so the
+        # live turns start with a user turn right after the summary pair and
+        # roles keep alternating.
+        while self._live_tokens() > self.live_budget:
+            end = self._exchange_end(self._first_live)
+            if end >= len(self.messages):
+                break
+            for message in self.messages[self._first_live:end]:
+                prefix = "User asked" if message["role"] == "user" else "Assistant answered"
+                self.summary_lines.append(f"- {prefix}: {_clip(message['content'], 160)}")
+            self._first_live = end
+        while sum(estimate_tokens(line) for line in self.summary_lines) > self.summary_budget:
+            self.summary_lines.pop(0)
+        # Bound session memory; anything dropped here is already summarized
+        overflow = len(self.messages) - self.max_stored
+        if overflow > 0 and self._first_live >= overflow:
+            del self.messages[:overflow]
+            self._first_live -= overflow
+            self.dropped += overflow
+
+    def context(self):
+        live = self.messages[self._first_live:]
+        if not self.summary_lines:
+            return list(live)
+        summary = "Summary of the earlier conversation:\n" + "\n".join(self.summary_lines)
+        return [
+            {"role": "user", "content": summary},
+            {"role": "assistant", "content": "Understood, I'll keep that in mind."},
+        ] + live
+
+    def window(self, size):
+        return self.messages[-size:]
@@ -0,0 +1,113 @@
+import os
+import threading
+
+import numpy as np
+import streamlit as st
+
+from diagnostics.cache import LRUCache
+from diagnostics.metrics import timed
+from diagnostics.whatif import risk_scores
+
+# ===================== FEATURE ATTRIBUTIONS =====================
+# Occlusion against a stored background sample: each feature in turn is
+# swapped for every background patient's value, and its contribution is how
+# far the risk falls on average (negative when the value lowers risk). All
+# features x background rows form one matrix scored in a single model call,
+# and results are cached per feature vector.
+#
+# The repo ships no training data, so the background is drawn once from the
+# training mean and spread recorded in each pickled scaler, clipped to the
+# input ranges, and saved next to the model by scripts/export_fused_models.py.
+
+BACKGROUND_SIZE = 32
+EXPLAIN_CACHE_SIZE = int(os.environ.get("EXPLAIN_CACHE_SIZE", "1024"))
+TOP_FACTORS = 5
+
+explain_cache = LRUCache(EXPLAIN_CACHE_SIZE)
+
+_backgrounds = {}
+_backgrounds_lock = threading.Lock()
+
+
+def build_background(scaler, inputs, size=BACKGROUND_SIZE, seed=0):
+    rng = np.random.default_rng(seed)
+    sample = rng.normal(scaler.mean_, scaler.scale_, size=(size, len(scaler.mean_)))
+    for j, (_, low, high) in enumerate(inputs):
+        sample[:, j] = np.clip(sample[:, j], low, high)
+        if isinstance(low, int) and isinstance(high, int):
+            sample[:, j] = np.round(sample[:, j])
+    return sample
+
+
+def get_background(name):
+    from diagnostics.registry import MODEL_SPECS, _load_pickle_bundle, background_path
+    with _backgrounds_lock:
+        background = _backgrounds.get(name)
+        if background is None:
+            path = background_path(name)
+            if os.path.exists(path):
+                background = np.load(path)
+            else:
+                # Not exported yet: derive it from the pickled scaler
+                background = build_background(_load_pickle_bundle(name).scaler, MODEL_SPECS[name]["inputs"])
+            _backgrounds[name] = background
+        return background
+
+
+def occlusion_rows(row, background):
+    """The row itself, then for each feature j the row with column j set to every background value."""
+    x = np.asarray(row, dtype=np.float64)
+    n_features, size = len(x), len(background)
+    X = np.repeat(x.reshape(1, -1), 1 + n_features * size, axis=0)
+    blocks = X[1:].reshape(n_features, size, n_features)
+    blocks[np.arange(n_features), :, np.arange(n_features)] = background.T
+    return X
+
+
+def attributions(bundle, row):
+    """Risk for the row and one contribution per feature, in feature order."""
+    def compute():
+        background = get_background(bundle.name)
+        X = occlusion_rows(row, background)
+        with timed("explain", model=bundle.name):
+            risk = risk_scores(bundle.model, bundle.scaler, X)
+        occluded = risk[1:].reshape(len(row), len(background)).mean(axis=1)
+        return risk[0], risk[0] - occluded
+
+    return explain_cache.get_or_compute((bundle.version, tuple(float(v) for v in row)), compute)
+
+
+def input_labels(name):
+    from diagnostics.registry import MODEL_SPECS
+    return [label for label, _, _ in MODEL_SPECS[name]["inputs"]]
+
+
+def top_factors(bundle, row, top=TOP_FACTORS):
+    # (label, value, contribution) for the features that moved the risk most
+    _, contributions = attributions(bundle, row)
+    labels = input_labels(bundle.name)
+    order = np.argsort(-np.abs(contributions))[:top]
+    return [(labels[j], row[j], float(contributions[j])) for j in order if abs(contributions[j]) >= 0.005]
+
+
+def factor_lines(factors):
+    return [
+        f"{label} = {value:g}: {'raises' if c > 0 else 'lowers'} risk by {abs(c) * 100:.1f} points"
+        for label, value, c in factors
+    ]
+
+
+def attribution_section(bundle, row):
+    risk, contributions = attributions(bundle, row)
+    st.subheader("🧾 Why this result")
+    lines = factor_lines(top_factors(bundle, row))
+    if not lines:
+        st.caption(f"Predicted risk {risk:.0%}. No single value moves it noticeably.")
+        return
+    st.bar_chart(
+        {"Contribution": dict(zip(input_labels(bundle.name), (contributions * 100).tolist()))},
+        horizontal=True, x_label="Change in risk (percentage points)"
+    )
+    st.markdown("\n".join(f"- {line}" for line in lines))
+    st.caption(f"Predicted risk {risk:.0%}. Each value is compared with {len(get_background(bundle.name))} "
+               "reference patients; positive bars push towards the disease.")
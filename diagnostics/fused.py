@@ -0,0 +1,355 @@
+import hashlib
+import mmap
+import os
+
+import numpy as np
+
+# ===================== FUSED NUMPY PREDICTORS =====================
+# A pickled (model, scaler) pair compiled into flat arrays. The StandardScaler
+# is folded into the model, so predict works on raw feature rows with no
+# sklearn validation overhead:
+#   * forests: every split threshold is moved into raw feature space
+#   * linear models: weights and intercept absorb the mean and scale
+# FoldedScaler.transform is the identity, which keeps the usual
+# `model.predict(scaler.transform(X))` call sites working unchanged.
+
+# 2: forests store interleaved children and a leaf mask instead of left/right
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+_SIGN = np.int64(-0x8000000000000000)
+
+
+class FoldedScaler:
+    # Scaling already lives inside the fused model
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float64)
+
+
+def _float_key(x):
+    # Map float64 -> int64 so that integer order matches float order
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits < 0, _SIGN - bits, bits)
+
+
+def _key_float(k):
+    bits = np.where(k < 0, _SIGN - k, k)
+    return bits.astype(np.int64).view(np.float64)
+
+
+def fold_thresholds(threshold, mean, scale):
+    """Largest raw x per split with float32((x - mean) / scale) <= threshold.
+
+    sklearn trees compare the float32-cast scaled value against a float64
+    threshold. That map is monotone in x, so a bisection over float64 values
+    gives a raw-space threshold with exactly the same decisions.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    mean = np.asarray(mean, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+
+    def goes_left(x):
+        # Probing near +-float64 max overflows float32 on purpose
+        with np.errstate(over="ignore", invalid="ignore"):
+            return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    big = np.finfo(np.float64).max
+    lo = np.full(threshold.shape, _float_key(-big), dtype=np.int64)
+    hi = np.full(threshold.shape, _float_key(big), dtype=np.int64)
+    all_left = goes_left(np.full(threshold.shape, big))
+    none_left = ~goes_left(np.full(threshold.shape, -big))
+    # Invariant: goes_left(lo) is True and goes_left(hi) is False
+    while True:
+        open_ = hi > lo + 1
+        if not open_.any():
+            break
+        # Overflow-free floor((lo + hi) / 2)
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        left = goes_left(_key_float(mid))
+        lo = np.where(open_ & left, mid, lo)
+        hi = np.where(open_ & ~left, mid, hi)
+    folded = _key_float(lo)
+    folded[all_left] = np.inf
+    folded[none_left] = -np.inf
+    return folded
+
+
+# ===================== FORESTS =====================
+def interleave_children(left, right):
+    """Interleaved (left, right) pairs and the leaf mask (leaves point at themselves)."""
+    return np.stack([left, right], axis=1).ravel(), left == np.arange(len(left))
+
+
+class FusedForest:
+    def __init__(self, feature, threshold, children, leaf, value, roots, classes, depth):
+        self.feature = feature
+        self.threshold = threshold
+        # Interleaved (left, right) pairs: one flat gather picks the next node.
+        # Both are exported as is, so mapped models keep no private copies.
+        self.children = children
+        self.leaf = leaf
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.depth = int(depth)
+        self.n_features_in_ = int(feature.max()) + 1 if len(feature) else 0
+
+    @property
+    def left(self):
+        return self.children[0::2]
+
+    @property
+    def right(self):
+        return self.children[1::2]
+
+    def _leaves(self, X):
+        flat = X.ravel()
+        offset = np.tile(np.arange(len(X)) * X.shape[1], len(self.roots))
+        node = np.repeat(self.roots, len(X))
+        # Only the (tree, row) pairs that haven't reached a leaf keep walking,
+        # so shallow paths stop costing anything once they end
+        walking = np.flatnonzero(~self.leaf.take(node))
+        while walking.size:
+            current = node.take(walking)
+            go_left = flat.take(offset.take(walking) + self.feature.take(current)) <= self.threshold.take(current)
+            current = self.children.take(2 * current + 1 - go_left)
+            node[walking] = current
+            walking = walking[~self.leaf.take(current)]
+        return node.reshape(len(self.roots), len(X))
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        node = self._leaves(X)
+        proba = np.zeros((len(X), self.value.shape[1]))
+        for tree_nodes in node:
+            proba += self.value[tree_nodes]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def fix_features(self, row, free):
+        """This forest with every feature outside `free` held at its value in `row`.
+
+        Splits on held features are decided once up front, so rows that only
+        differ in the free columns (a what-if sweep) walk just the splits on
+        those columns. Predictions are only valid for such rows.
+        """
+        row = np.asarray(row, dtype=np.float64)
+        nodes = np.arange(len(self.feature), dtype=self.left.dtype)
+        decided = np.where(row[self.feature] <= self.threshold, self.left, self.right)
+        jump = np.where(np.isin(self.feature, free), nodes, decided)
+        # Pointer doubling: each round doubles the run of held splits skipped
+        while True:
+            step = jump.take(jump)
+            if np.array_equal(step, jump):
+                break
+            jump = step
+        return FusedForest(self.feature, self.threshold, jump.take(self.children), self.leaf,
+                           self.value, jump.take(self.roots), self.classes_, self.depth)
+
+    def arrays(self):
+        return {
+            "kind": np.array("forest"),
+            "feature": self.feature, "threshold": self.threshold,
+            "children": self.children, "leaf": self.leaf, "value": self.value,
+            "roots": self.roots, "classes": self.classes_, "depth": np.array(self.depth),
+        }
+
+    @classmethod
+    def from_arrays(cls, a):
+        if "children" in a:
+            children, leaf = a["children"], a["leaf"]
+        else:
+            # Format 1 export: derived here, so these two arrays are private copies
+            children, leaf = interleave_children(a["left"], a["right"])
+        return cls(a["feature"], a["threshold"], children, leaf, a["value"],
+                   a["roots"], a["classes"], a["depth"])
+
+
+def compile_forest(model, scaler):
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset, depth = 0, 0
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        feature = np.where(leaf, 0, tree.feature).astype(np.int32)
+        threshold = tree.threshold.astype(np.float64)
+        if mean is not None:
+            threshold = np.where(leaf, np.inf, fold_thresholds(threshold, mean[feature], scale[feature]))
+        else:
+            threshold = np.where(leaf, np.inf, threshold.astype(np.float32).astype(np.float64))
+        own = np.arange(n, dtype=np.int32) + offset
+        left = np.where(leaf, own, tree.children_left + offset).astype(np.int32)
+        right = np.where(leaf, own, tree.children_right + offset).astype(np.int32)
+        value = tree.value[:, 0, :].astype(np.float64)
+        value = value / value.sum(axis=1, keepdims=True)
+
+        features.append(feature)
+        thresholds.append(threshold)
+        lefts.append(left)
+        rights.append(right)
+        values.append(value)
+        roots.append(offset)
+        offset += n
+        depth = max(depth, tree.max_depth)
+    return FusedForest(
+        np.concatenate(features), np.concatenate(thresholds),
+        *interleave_children(np.concatenate(lefts), np.concatenate(rights)), np.concatenate(values),
+        np.array(roots, dtype=np.int32), np.asarray(model.classes_), depth,
+    )
+
+
+# ===================== LINEAR MODELS =====================
+class FusedLinear:
+    def __init__(self, coef, intercept, classes):
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = classes
+        self.n_features_in_ = coef.shape[1]
+
+    def decision_function(self, X):
+        scores = np.asarray(X, dtype=np.float64) @ self.coef.T + self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return np.column_stack([1 - p, p])
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        index = (scores > 0).astype(int) if scores.ndim == 1 else np.argmax(scores, axis=1)
+        return self.classes_.take(index, axis=0)
+
+    def arrays(self):
+        return {"kind": np.array("linear"), "coef": self.coef,
+                "intercept": self.intercept, "classes": self.classes_}
+
+    @classmethod
+    def from_arrays(cls, a):
+        return cls(a["coef"], a["intercept"], a["classes"])
+
+
+def compile_linear(model, scaler):
+    coef = np.atleast_2d(model.coef_).astype(np.float64)
+    intercept = np.atleast_1d(model.intercept_).astype(np.float64)
+    if getattr(scaler, "scale_", None) is not None:
+        coef = coef / scaler.scale_
+    if getattr(scaler, "mean_", None) is not None:
+        intercept = intercept - coef @ scaler.mean_
+    return FusedLinear(coef, intercept, np.asarray(model.classes_))
+
+
+# ===================== EXPORT / LOAD =====================
+def compile_model(model, scaler):
+    if hasattr(model, "estimators_") and all(hasattr(e, "tree_") for e in model.estimators_):
+        return compile_forest(model, scaler)
+    if hasattr(model, "coef_"):
+        return compile_linear(model, scaler)
+    raise TypeError(f"Cannot compile {type(model).__name__} into a fused predictor")
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def save_fused(path, fused, features, source_path):
+    arrays = fused.arrays()
+    arrays["features"] = np.array(features)
+    arrays["source_sha256"] = np.array(file_sha256(source_path))
+    arrays["format_version"] = np.array(FORMAT_VERSION)
+    np.savez(path, **arrays)
+
+
+def load_fused(path):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {k: data[k] for k in data.files}
+    kind = str(arrays["kind"])
+    fused = FusedForest.from_arrays(arrays) if kind == "forest" else FusedLinear.from_arrays(arrays)
+    return fused, [str(f) for f in arrays["features"]], str(arrays["source_sha256"])
+
+
+# ===================== MEMORY-MAPPED EXPORT =====================
+# The same arrays as one .npy file each plus a JSON manifest. Loading maps
+# the files read-only instead of copying them onto the heap, so replicas on
+# one host share the physical pages and a load costs only the page faults.
+
+MANIFEST = "manifest.json"
+
+
+def save_mmap(directory, fused, features, source_path):
+    import json
+    import shutil
+    import tempfile
+    arrays = fused.arrays()
+    kind = str(arrays.pop("kind"))
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "kind": kind,
+        "features": [str(f) for f in features],
+        "source_sha256": file_sha256(source_path),
+        "arrays": {},
+    }
+    parent = os.path.dirname(os.path.abspath(directory))
+    tmp = tempfile.mkdtemp(prefix=".mmap-", dir=parent)
+    try:
+        for name, array in arrays.items():
+            if array.ndim == 0:
+                manifest["arrays"][name] = {"value": array.item()}
+                continue
+            array = np.ascontiguousarray(array)
+            np.save(os.path.join(tmp, f"{name}.npy"), array, allow_pickle=False)
+            manifest["arrays"][name] = {"file": f"{name}.npy", "dtype": array.dtype.str, "shape": list(array.shape)}
+        with open(os.path.join(tmp, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        # Swap the finished directory into place so readers never see a partial export
+        old = None
+        if os.path.exists(directory):
+            old = tempfile.mkdtemp(prefix=".mmap-old-", dir=parent)
+            os.replace(directory, os.path.join(old, "export"))
+        os.replace(tmp, directory)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def load_mmap(directory):
+    import json
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest["format_version"] not in READABLE_VERSIONS:
+        raise ValueError(f"{directory}: unsupported format version {manifest['format_version']}")
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        if "value" in entry:
+            arrays[name] = np.array(entry["value"])
+            continue
+        mapped = np.load(os.path.join(directory, entry["file"]), mmap_mode="r", allow_pickle=False)
+        if mapped.dtype.str != entry["dtype"] or list(mapped.shape) != entry["shape"]:
+            raise ValueError(f"{directory}: {entry['file']} does not match the manifest")
+        # Plain ndarray view over the mapping; np.memmap indexing is slower
+        arrays[name] = mapped.view(np.ndarray)
+    cls = FusedForest if manifest["kind"] == "forest" else FusedLinear
+    return cls.from_arrays(arrays), manifest["features"], manifest["source_sha256"]
+
+
+def is_mapped(array):
+    # True when the array's memory comes from a file mapping
+    base = array
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return True
+        base = base.base
+    return isinstance(base, mmap.mmap)
@@ -0,0 +1,293 @@
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# ===================== METRICS =====================
+# Process-wide latency histograms and counters for each stage of a request
+# (model load, scaler.transform, model.predict, create_pdf, downloads, ...).
+# Everything is rendered in the Prometheus text format together with cache
+# hit rates, model memory and process RSS, and can be exported through a
+# small HTTP endpoint (METRICS_PORT, which also answers /readyz from the
+# warm-up status) and/or a periodically rewritten file (METRICS_FILE). Only
+# the standard library is used so importing this module stays cheap on
+# every page.
+
+STAGE_METRIC = "diagnostics_stage_seconds"
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+METRICS_PORT = os.environ.get("METRICS_PORT")
+METRICS_FILE = os.environ.get("METRICS_FILE")
+METRICS_FILE_INTERVAL = float(os.environ.get("METRICS_FILE_INTERVAL", "15"))
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, stage, seconds, **labels):
+        key = _label_key({"stage": stage, **labels})
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timed(self, stage, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def stages(self):
+        # Summary rows for the admin page
+        with self._lock:
+            items = [(dict(key), h) for key, h in self._histograms.items()]
+        rows = []
+        for labels, h in sorted(items, key=lambda item: sorted(item[0].items())):
+            stage = labels.pop("stage")
+            rows.append({
+                "stage": stage,
+                "labels": ", ".join(f"{k}={v}" for k, v in sorted(labels.items())),
+                "count": h.count,
+                "mean_ms": round(h.sum / h.count * 1000, 2) if h.count else 0.0,
+                "p50_ms": h.quantile(0.5) * 1000,
+                "p95_ms": h.quantile(0.95) * 1000,
+                "total_s": round(h.sum, 3),
+            })
+        return rows
+
+    def counters(self):
+        with self._lock:
+            return {(name, labels): value for (name, labels), value in self._counters.items()}
+
+    def render(self):
+        lines = [
+            f"# HELP {STAGE_METRIC} Latency of each request stage.",
+            f"# TYPE {STAGE_METRIC} histogram",
+        ]
+        with self._lock:
+            histograms = sorted((key, h.counts[:], h.sum, h.count) for key, h in self._histograms.items())
+            counters = sorted(self._counters.items())
+        for key, counts, total, count in histograms:
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                pairs = key + (("le", _format_value(bound)),)
+                lines.append(f"{STAGE_METRIC}_bucket{_format_labels(pairs)} {cumulative}")
+            lines.append(f"{STAGE_METRIC}_sum{_format_labels(key)} {total!r}")
+            lines.append(f"{STAGE_METRIC}_count{_format_labels(key)} {count}")
+
+        typed = set()
+        for (name, key), value in counters:
+            metric = f"diagnostics_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_format_labels(key)} {_format_value(value)}")
+
+        lines.extend(_resource_lines())
+        return "\n".join(lines) + "\n"
+
+
+def cache_stats():
+    # Caches are only reported once the module that owns them has been imported
+    stats = {}
+    if "diagnostics.cache" in sys.modules:
+        for name, s in sys.modules["diagnostics.cache"].prediction_cache_stats().items():
+            stats[f"prediction:{name}"] = s
+    if "diagnostics.chat" in sys.modules:
+        stats["chat_faq"] = sys.modules["diagnostics.chat"].faq_cache.stats()
+    if "diagnostics.brain" in sys.modules:
+        stats["brain_preprocess"] = sys.modules["diagnostics.brain"].preprocess_cache.stats()
+    if "diagnostics.whatif" in sys.modules:
+        stats["whatif"] = sys.modules["diagnostics.whatif"].whatif_cache.stats()
+    if "diagnostics.explain" in sys.modules:
+        stats["explain"] = sys.modules["diagnostics.explain"].explain_cache.stats()
+    return stats
+
+
+def batcher_stats():
+    if "diagnostics.batching" not in sys.modules:
+        return {}
+    return sys.modules["diagnostics.batching"].batcher_stats()
+
+
+def _gauge(lines, metric, help_text, samples):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} gauge")
+    for pairs, value in samples:
+        lines.append(f"{metric}{_format_labels(pairs)} {_format_value(value)}")
+
+
+def _resource_lines():
+    from diagnostics.registry import memory_report
+    lines = []
+    caches = cache_stats()
+    for field, help_text in [
+        ("hits", "Cache hits."), ("misses", "Cache misses."), ("evictions", "Cache evictions."),
+        ("size", "Entries currently cached."), ("hit_rate", "Hits over lookups."),
+    ]:
+        _gauge(lines, f"diagnostics_cache_{field}", help_text,
+               [((("cache", name),), s[field]) for name, s in sorted(caches.items())])
+
+    batchers = sorted(batcher_stats().items())
+    for field, help_text in [
+        ("queue_depth", "Requests waiting in the micro-batcher queue."),
+        ("batches", "Forward passes run by the micro-batcher."),
+        ("completed", "Requests answered by the micro-batcher."),
+        ("rejected", "Requests refused because the queue was full."),
+        ("mean_batch_size", "Average requests per forward pass."),
+    ]:
+        _gauge(lines, f"diagnostics_batcher_{field}", help_text,
+               [((("batcher", name),), s[field]) for name, s in batchers])
+
+    report = memory_report()
+    _gauge(lines, "diagnostics_process_resident_memory_bytes", "Resident set size of the process.",
+           [((), report["process_rss_bytes"])])
+    models = sorted(report["models"].items())
+    for field, help_text in [
+        ("file_bytes", "Size of the model artifact on disk."),
+        ("resident_bytes", "Approximate private memory held by the loaded model."),
+        ("mapped_bytes", "Model arrays mapped read-only from disk and shared between processes."),
+        ("load_seconds", "Time taken to load the model."),
+    ]:
+        _gauge(lines, f"diagnostics_model_{field}", help_text,
+               [((("model", name),), m[field]) for name, m in models])
+    return lines
+
+
+metrics = Metrics()
+observe = metrics.observe
+inc = metrics.inc
+timed = metrics.timed
+
+
+# ===================== EXPORTERS =====================
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def write_metrics_file(path):
+    # Written next to the target and renamed so scrapers never see half a file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(metrics.render())
+    os.replace(tmp, path)
+
+
+def _file_loop(path, interval):
+    while True:
+        try:
+            write_metrics_file(path)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+def start_http_server(port, host="0.0.0.0"):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/metrics":
+                self._send(200, metrics.render(), "text/plain; version=0.0.4")
+            elif path == "/readyz":
+                # Same answer as the HTTP API's /readyz, so load balancers can
+                # probe Streamlit replicas too
+                from diagnostics.warmup import readiness
+                status = readiness()
+                self._send(200 if status["ready"] else 503, json.dumps(status), "application/json")
+            else:
+                self.send_error(404)
+
+        def _send(self, code, text, content_type):
+            body = text.encode()
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_exporters(port=METRICS_PORT, path=METRICS_FILE, interval=METRICS_FILE_INTERVAL):
+    # Safe to call on every rerun; exporters start once per process
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if port:
+            try:
+                start_http_server(port)
+            except OSError as e:
+                print(f"metrics: could not listen on port {port}: {e}", file=sys.stderr)
+        if path:
+            threading.Thread(target=_file_loop, args=(path, interval), name="metrics-file", daemon=True).start()
@@ -0,0 +1,321 @@
+import os
+import pickle
+import sys
+import threading
+import time
+
+import numpy as np
+
+from diagnostics.artifacts import fetch_artifact
+from diagnostics.fused import FoldedScaler, file_sha256, is_mapped, load_fused, load_mmap
+from diagnostics.metrics import observe, timed
+
+# ===================== MODEL REGISTRY =====================
+# One process-wide home for every model artifact. app.py and each page under
+# pages/ import from here, so a pickle is unpickled once per server process no
+# matter how many entry points or sessions use it.
+# "inputs" mirrors the input forms: a (label, min, max) per feature, in
+# feature order, and "defaults" their starting values.
+
+MODEL_SPECS = {
+    "heart": {
+        "disease": "Heart Disease",
+        "path": "models/heart_model.pkl",
+        "features": [
+            "Age", "Sex", "Chest pain type", "BP", "Cholesterol",
+            "FBS over 120", "EKG results", "Max HR", "Exercise angina",
+            "ST depression", "Slope of ST", "Number of vessels fluro", "Thallium"
+        ],
+        "inputs": [
+            ("Age", 0, 120), ("Sex (0=F,1=M)", 0, 1), ("Chest Pain Type", 0, 3), ("BP", 80, 200),
+            ("Cholesterol", 100, 600), ("FBS > 120", 0, 1), ("Rest ECG", 0, 2), ("Max HR", 60, 250),
+            ("Exercise angina", 0, 1), ("ST Depression", 0.0, 10.0), ("Slope ST", 0, 2),
+            ("Vessels colored", 0, 3), ("Thalassemia", 1, 3)
+        ],
+        "defaults": [52, 0, 0, 120, 240, 0, 1, 150, 0, 1.2, 1, 0, 2],
+    },
+    "diabetes": {
+        "disease": "Diabetes",
+        "path": "models/diabetes_model.pkl",
+        "features": [
+            "Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
+            "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"
+        ],
+        "inputs": [
+            ("Pregnancies", 0, 20), ("Glucose", 0, 300), ("BP", 0, 200), ("Skin Thickness", 0, 100),
+            ("Insulin", 0, 900), ("BMI", 0.0, 70.0), ("DPF", 0.0, 3.0), ("Age", 1, 120)
+        ],
+        "defaults": [2, 120, 70, 20, 85, 28.5, 0.5, 32],
+    },
+    "kidney": {
+        "disease": "Kidney Disease",
+        "path": "models/kidney_10f_model.pkl",
+        "features": ["age", "bp", "sg", "al", "su", "bgr", "bu", "sc", "hemo", "pcv"],
+        "inputs": [
+            ("Age", 0, 120), ("Blood Pressure", 0, 200), ("Specific Gravity", 1.0, 1.05),
+            ("Albumin", 0, 5), ("Sugar", 0, 5), ("Blood Glucose Random", 0, 500),
+            ("Blood Urea", 0, 200), ("Serum Creatinine", 0.0, 20.0), ("Hemoglobin", 0.0, 20.0),
+            ("Packed Cell Volume", 0, 60)
+        ],
+        "defaults": [45, 80, 1.02, 0, 0, 110, 25, 1.0, 15.2, 44],
+    },
+    "liver": {
+        "disease": "Liver Disease",
+        "path": "models/liver_model.pkl",
+        "features": [
+            "Age", "Gender", "Total_Bilirubin", "Direct_Bilirubin",
+            "Alkaline_Phosphotase", "Alamine_Aminotransferase",
+            "Aspartate_Aminotransferase", "Total_Protiens",
+            "Albumin", "Albumin_and_Globulin_Ratio"
+        ],
+        "inputs": [
+            ("Age", 1, 120), ("Gender (1=Male)", 0, 1), ("Total Bilirubin", 0.0, 10.0),
+            ("Direct Bilirubin", 0.0, 5.0), ("Alkaline Phosphotase", 50, 2000), ("ALT", 1, 2000),
+            ("AST", 1, 2000), ("Total Proteins", 1.0, 10.0), ("Albumin", 1.0, 6.0),
+            ("Albumin/Globulin Ratio", 0.0, 3.0)
+        ],
+        "defaults": [45, 1, 1.3, 0.4, 210, 35, 40, 6.8, 3.1, 0.9],
+    },
+}
+
+# BRAIN_MODEL_URL may point at a local file server or a file:// path for offline use
+BRAIN_MODEL_PATH = os.environ.get("BRAIN_MODEL_PATH", "models/brain_tumor_model.h5")
+BRAIN_MODEL_URL = os.environ.get(
+    "BRAIN_MODEL_URL",
+    "https://drive.google.com/uc?id=1r7Kmf14ZGKQK3GSTk3nxPxfAyGpg2m_b&export=download"
+)
+BRAIN_MODEL_SHA256 = os.environ.get("BRAIN_MODEL_SHA256")
+# Quantized model from scripts/convert_brain_tflite.py; BRAIN_RUNTIME picks the default
+BRAIN_TFLITE_PATH = os.environ.get("BRAIN_TFLITE_PATH", "models/brain_tumor_model.tflite")
+BRAIN_RUNTIMES = ("keras", "tflite")
+DEFAULT_BRAIN_RUNTIME = os.environ.get("BRAIN_RUNTIME", "keras")
+
+# Set USE_FUSED_MODELS=0 to force the sklearn pickles even when fused exports
+# exist. The memory-mapped export is preferred over the .npz when both are there.
+USE_FUSED_MODELS = os.environ.get("USE_FUSED_MODELS", "1") != "0"
+# Fused models win on the few hundred rows or fewer the pages send; sklearn's
+# compiled tree walk wins on bulk batches (2-3x at 5000 rows). Larger inputs
+# go to the source pickle, which is loaded on first use.
+FUSED_MAX_ROWS = int(os.environ.get("FUSED_MAX_ROWS", "512"))
+
+_models = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+class ModelBundle:
+    def __init__(self, name, model, scaler=None, features=None, path=None, load_seconds=0.0, version=None):
+        self.name = name
+        self.model = model
+        self.scaler = scaler
+        self.features = features or []
+        self.path = path
+        self.load_seconds = load_seconds
+        self.file_bytes = _path_bytes(path) if path and os.path.exists(path) else 0
+        # Identifies the trained weights; fused exports share their source pickle's version
+        self.version = version
+
+    def __repr__(self):
+        return f"ModelBundle({self.name!r}, features={len(self.features)}, path={self.path!r})"
+
+
+def _path_bytes(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def _lock_for(name):
+    with _registry_lock:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _get_or_load(name, loader):
+    bundle = _models.get(name)
+    if bundle is not None:
+        return bundle
+    with _lock_for(name):
+        bundle = _models.get(name)
+        if bundle is None:
+            start = time.perf_counter()
+            bundle = loader()
+            bundle.load_seconds = time.perf_counter() - start
+            observe("model_load", bundle.load_seconds, model=name)
+            _models[name] = bundle
+    return bundle
+
+
+# ===================== TABULAR MODELS =====================
+def fused_path(name):
+    # Written by scripts/export_fused_models.py next to the source pickle
+    return os.path.splitext(MODEL_SPECS[name]["path"])[0] + ".fused.npz"
+
+
+def mmap_path(name):
+    # Directory of .npy files + manifest.json, also written by scripts/export_fused_models.py
+    return os.path.splitext(MODEL_SPECS[name]["path"])[0] + ".mmap"
+
+
+def background_path(name):
+    # Reference patients for feature attributions (diagnostics/explain.py)
+    return os.path.splitext(MODEL_SPECS[name]["path"])[0] + ".background.npy"
+
+
+class RoutedModel:
+    # Fused export for small inputs, the sklearn pipeline above FUSED_MAX_ROWS
+    def __init__(self, name, fused, max_rows=None):
+        self.name = name
+        self.fused = fused
+        self.max_rows = FUSED_MAX_ROWS if max_rows is None else max_rows
+        self.classes_ = fused.classes_
+        self.n_features_in_ = fused.n_features_in_
+        self._pipeline = None
+        self._lock = threading.Lock()
+
+    def _bulk_pipeline(self):
+        with self._lock:
+            if self._pipeline is None:
+                bundle = _load_pickle_bundle(self.name)
+                self._pipeline = (bundle.model, bundle.scaler)
+        return self._pipeline
+
+    def _call(self, method, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 2 and len(X) > self.max_rows:
+            model, scaler = self._bulk_pipeline()
+            return getattr(model, method)(scaler.transform(X))
+        return getattr(self.fused, method)(X)
+
+    def predict(self, X):
+        return self._call("predict", X)
+
+    def predict_proba(self, X):
+        return self._call("predict_proba", X)
+
+    def __getattr__(self, attr):
+        # Everything else (fix_features for what-if sweeps, ...) is the fused model's
+        return getattr(self.fused, attr)
+
+
+def _load_fused_bundle(name):
+    for path, loader in ((mmap_path(name), load_mmap), (fused_path(name), load_fused)):
+        if not USE_FUSED_MODELS or not os.path.exists(path):
+            continue
+        model, features, source_sha256 = loader(path)
+        if source_sha256 != file_sha256(MODEL_SPECS[name]["path"]):
+            # The pickle was retrained after the export; fall back to it
+            continue
+        return ModelBundle(name, RoutedModel(name, model), FoldedScaler(), features, path, version=source_sha256[:16])
+    return None
+
+
+def _load_pickle_bundle(name):
+    spec = MODEL_SPECS[name]
+    with open(spec["path"], "rb") as f:
+        data = pickle.load(f)
+    if isinstance(data, tuple):
+        model, scaler = data[0], data[1]
+        features = list(getattr(scaler, "feature_names_in_", spec["features"]))
+    else:
+        model = data["model"]
+        scaler = data["scaler"]
+        features = list(data.get("features", spec["features"]))
+    return ModelBundle(name, model, scaler, features, spec["path"], version=file_sha256(spec["path"])[:16])
+
+
+def get_model(name):
+    if name not in MODEL_SPECS:
+        raise KeyError(f"Unknown model: {name}")
+    return _get_or_load(name, lambda: _load_fused_bundle(name) or _load_pickle_bundle(name))
+
+
+# ===================== BRAIN MODEL =====================
+def _load_brain_bundle():
+    from tensorflow.keras.models import load_model
+    with timed("model_download", model="brain"):
+        fetch_artifact(BRAIN_MODEL_URL, BRAIN_MODEL_PATH, BRAIN_MODEL_SHA256)
+    return ModelBundle("brain", load_model(BRAIN_MODEL_PATH), path=BRAIN_MODEL_PATH)
+
+
+def _load_brain_tflite_bundle():
+    from diagnostics.brain import TFLiteBrainModel
+    if not os.path.exists(BRAIN_TFLITE_PATH):
+        raise FileNotFoundError(
+            f"{BRAIN_TFLITE_PATH} not found; run scripts/convert_brain_tflite.py first"
+        )
+    return ModelBundle("brain-tflite", TFLiteBrainModel(BRAIN_TFLITE_PATH), path=BRAIN_TFLITE_PATH)
+
+
+def brain_tflite_available():
+    return os.path.exists(BRAIN_TFLITE_PATH)
+
+
+def get_brain_model(runtime=None):
+    runtime = runtime or DEFAULT_BRAIN_RUNTIME
+    if runtime == "tflite":
+        return _get_or_load("brain-tflite", _load_brain_tflite_bundle).model
+    if runtime != "keras":
+        raise KeyError(f"Unknown brain runtime: {runtime}")
+    return _get_or_load("brain", _load_brain_bundle).model
+
+
+# ===================== MEMORY REPORT =====================
+def _array_bytes(obj, seen, mapped=None):
+    # seen maps id -> object so temporaries stay alive and their ids aren't reused.
+    # File-mapped arrays are shared between processes; they're added to mapped[0]
+    # instead of the private total.
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+    if isinstance(obj, np.ndarray):
+        if is_mapped(obj):
+            if mapped is not None:
+                mapped[0] += obj.nbytes
+            return 0
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(_array_bytes(v, seen, mapped) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_array_bytes(v, seen, mapped) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return _array_bytes(vars(obj), seen, mapped)
+    if type(obj).__module__.startswith("sklearn") and hasattr(obj, "__getstate__"):
+        # Cython objects such as sklearn's Tree keep their arrays behind __getstate__
+        return _array_bytes(obj.__getstate__(), seen, mapped)
+    return 0
+
+
+def _keras_bytes(model):
+    try:
+        return sum(int(np.prod(w.shape)) * np.dtype(str(w.dtype)).itemsize for w in model.weights)
+    except Exception:
+        return 0
+
+
+def process_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def memory_report():
+    models = {}
+    for name, bundle in list(_models.items()):
+        mapped = [0]
+        if name == "brain-tflite":
+            resident = bundle.file_bytes
+        elif bundle.scaler is None:
+            resident = _keras_bytes(bundle.model)
+        else:
+            resident = _array_bytes(bundle.model, {}, mapped) + _array_bytes(bundle.scaler, {}, mapped)
+        models[name] = {
+            "file_bytes": bundle.file_bytes,
+            "resident_bytes": resident,
+            "mapped_bytes": mapped[0],
+            "load_seconds": round(bundle.load_seconds, 3),
+        }
+    return {"process_rss_bytes": process_rss_bytes(), "models": models}
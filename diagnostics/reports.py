@@ -0,0 +1,114 @@
+import copy
+import io
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from diagnostics.metrics import timed
+
+# ===================== PDF REPORTS =====================
+# Reports are built in memory: the MRI image is downscaled, JPEG-encoded into
+# a buffer and handed straight to fpdf, so nothing touches the working
+# directory. The page header is laid out once per process and copied for each
+# report, and the Streamlit download buttons only build the PDF when clicked.
+
+REPORT_IMAGE_MAX_SIDE = 800
+REPORT_IMAGE_QUALITY = 85
+# Below this many reports a process pool costs more than it saves
+BULK_POOL_MIN_JOBS = 8
+
+_template = None
+
+
+def _report_template():
+    global _template
+    if _template is None:
+        from fpdf import FPDF
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.set_font("Arial", "B", 16)
+        pdf.cell(0, 10, "Multi Disease Diagnostic Report", ln=True, align="C")
+        pdf.ln(5)
+        _template = pdf
+    return copy.deepcopy(_template)
+
+
+def _jpeg_info(image):
+    # fpdf 1.7 only reads images from disk, but it skips parsing for names
+    # already in pdf.images, so the parsed JPEG is registered there directly
+    preview = image.convert("RGB")
+    preview.thumbnail((REPORT_IMAGE_MAX_SIDE, REPORT_IMAGE_MAX_SIDE))
+    buffer = io.BytesIO()
+    preview.save(buffer, format="JPEG", quality=REPORT_IMAGE_QUALITY)
+    return {
+        "w": preview.width, "h": preview.height, "cs": "DeviceRGB",
+        "bpc": 8, "f": "DCTDecode", "data": buffer.getvalue(),
+    }
+
+
+def create_pdf(username, disease, result_text, image=None, factors=None):
+    pdf = _report_template()
+    pdf.set_font("Arial", size=12)
+    login_time = datetime.now().strftime("%d-%m-%Y %I:%M %p")
+    content = f"Username        : {username}\nLogin Time     : {login_time}\nDisease        : {disease}\n\nPrediction Result:\n{result_text}"
+    if factors:
+        # Lines from diagnostics.explain.factor_lines
+        content += "\n\nMain Factors:\n" + "\n".join(f"- {line}" for line in factors)
+    safe_text = content.encode("latin1","ignore").decode("latin1")
+    pdf.multi_cell(0,8,safe_text)
+    pdf.ln(5)
+    if image:
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, "Uploaded MRI Image:", ln=True)
+        name = "mri_image.jpg"
+        info = _jpeg_info(image)
+        info["i"] = len(pdf.images) + 1
+        pdf.images[name] = info
+        pdf.image(name, x=30, w=150)
+        pdf.ln(10)
+    return pdf.output(dest="S").encode("latin1")
+
+
+def pdf_download_button(label, file_name, key=None, **report):
+    # The callable runs only when the user clicks, not on every rerun. Streamlit
+    # is imported here so bulk-report worker processes never load it.
+    import streamlit as st
+
+    def render():
+        with timed("create_pdf", disease=report.get("disease", "")):
+            return create_pdf(**report)
+
+    st.download_button(
+        label,
+        render,
+        file_name=file_name,
+        mime="application/pdf",
+        key=key,
+        on_click="ignore"
+    )
+
+
+# ===================== BULK REPORTS =====================
+def _render_job(job):
+    return job["file_name"], create_pdf(job["username"], job["disease"], job["result_text"], job.get("image"))
+
+
+def render_reports_zip(jobs, max_workers=None):
+    """Render many reports (dicts with file_name, username, disease,
+    result_text and optional image) and return them as one zip archive."""
+    if len(jobs) < BULK_POOL_MIN_JOBS:
+        rendered = map(_render_job, jobs)
+        return _zip(rendered)
+    # spawn: forking a multi-threaded Streamlit server is unsafe
+    with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return _zip(pool.map(_render_job, jobs, chunksize=4))
+
+
+def _zip(rendered):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for file_name, pdf_bytes in rendered:
+            archive.writestr(file_name, pdf_bytes)
+    return buffer.getvalue()
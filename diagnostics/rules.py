@@ -0,0 +1,99 @@
+import threading
+
+import numpy as np
+
+# ===================== RULE-BASED ALERTS =====================
+# Threshold rules that flag obvious risk before (and instead of) the model.
+# They are declared once per disease against the model's feature names and
+# compiled into column indices and threshold vectors, so one comparison
+# evaluates every rule over a whole batch and reports which rules fired.
+# The Streamlit pages, disease_page, batch scoring and the HTTP API all use
+# the same specs.
+
+RULE_SPECS = {
+    "heart": [
+        {"feature": "Cholesterol", "op": ">", "threshold": 300, "label": "Cholesterol > 300"},
+        {"feature": "BP", "op": ">", "threshold": 160, "label": "Resting BP > 160"},
+        {"feature": "Max HR", "op": "<", "threshold": 100, "label": "Max heart rate < 100"},
+    ],
+    "diabetes": [
+        {"feature": "Glucose", "op": ">", "threshold": 180, "label": "Glucose > 180"},
+        {"feature": "BMI", "op": ">", "threshold": 40, "label": "BMI > 40"},
+        {"feature": "Insulin", "op": ">", "threshold": 300, "label": "Insulin > 300"},
+    ],
+    "kidney": [
+        {"feature": "bu", "op": ">", "threshold": 90, "label": "Blood urea > 90"},
+        {"feature": "sc", "op": ">", "threshold": 5, "label": "Serum creatinine > 5"},
+        {"feature": "hemo", "op": "<", "threshold": 10, "label": "Hemoglobin < 10"},
+        {"feature": "pcv", "op": "<", "threshold": 28, "label": "Packed cell volume < 28"},
+    ],
+    "liver": [
+        {"feature": "Total_Bilirubin", "op": ">", "threshold": 3, "label": "Total bilirubin > 3"},
+        {"feature": "Direct_Bilirubin", "op": ">", "threshold": 1.5, "label": "Direct bilirubin > 1.5"},
+        {"feature": "Alamine_Aminotransferase", "op": ">", "threshold": 200, "label": "ALT > 200"},
+        {"feature": "Aspartate_Aminotransferase", "op": ">", "threshold": 200, "label": "AST > 200"},
+    ],
+}
+
+OPERATORS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+
+
+class RuleSet:
+    def __init__(self, name, specs, features):
+        self.name = name
+        self.labels = [spec["label"] for spec in specs]
+        missing = [spec["feature"] for spec in specs if spec["feature"] not in features]
+        if missing:
+            raise KeyError(f"{name} rules reference unknown features: {', '.join(missing)}")
+        unknown = [spec["op"] for spec in specs if spec["op"] not in OPERATORS]
+        if unknown:
+            raise ValueError(f"{name} rules use unsupported operators: {', '.join(unknown)}")
+        self.columns = np.array([features.index(spec["feature"]) for spec in specs], dtype=np.intp)
+        self.thresholds = np.array([spec["threshold"] for spec in specs], dtype=np.float64)
+        # Rules are grouped by operator so each group is a single vectorized comparison
+        self._groups = [
+            (np.flatnonzero([spec["op"] == op for spec in specs]), OPERATORS[op])
+            for op in OPERATORS if any(spec["op"] == op for spec in specs)
+        ]
+
+    def evaluate(self, X):
+        """Boolean mask of shape (rows, rules); NaN inputs never fire."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        values = X[:, self.columns]
+        fired = np.zeros(values.shape, dtype=bool)
+        for index, compare in self._groups:
+            fired[:, index] = compare(values[:, index], self.thresholds[index])
+        return fired
+
+    def describe(self, fired_row):
+        return ", ".join(label for label, hit in zip(self.labels, fired_row) if hit)
+
+    def reasons(self, fired):
+        # One description per row ("" where nothing fired), built per rule
+        # rather than per row
+        out = np.full(len(fired), "", dtype=object)
+        for j, label in enumerate(self.labels):
+            hit = fired[:, j]
+            out[hit] = np.where(out[hit] == "", label, out[hit] + ", " + label)
+        return out
+
+
+def alert_text(disease, reasons=None):
+    if reasons:
+        return f"Possible {disease} Detected (Rule-Based Alert: {reasons})"
+    return f"Possible {disease} Detected (Rule-Based Alert)"
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_rules(name, features):
+    key = (name, tuple(features))
+    with _compiled_lock:
+        rules = _compiled.get(key)
+        if rules is None:
+            rules = _compiled[key] = RuleSet(name, RULE_SPECS.get(name, []), list(features))
+        return rules
@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from diagnostics.cache import cached_predict
+from diagnostics.metrics import inc, timed
+from diagnostics.registry import MODEL_SPECS, get_model
+from diagnostics.rules import alert_text, get_rules
+
+# ===================== COMBINED SCREENING =====================
+# One patient form for all four tabular models. Values several models ask
+# for are entered once and mapped onto each model's feature order next to
+# its own inputs, then the four predictions (rule pre-filter, cached model
+# call and attributions) run concurrently on a shared thread pool.
+#
+# Heart's "BP" is resting systolic pressure, while diabetes and kidney record
+# diastolic pressure, so only the latter two share a blood pressure field.
+
+SCREENING_MODELS = ["heart", "diabetes", "kidney", "liver"]
+SCREENING_WORKERS = int(os.environ.get("SCREENING_WORKERS", str(len(SCREENING_MODELS))))
+
+# Shared field -> (label, min, max, default)
+SHARED_INPUTS = {
+    "age": ("Age", 1, 120, 45),
+    "sex": ("Sex (0=F,1=M)", 0, 1, 1),
+    "diastolic_bp": ("Diastolic BP", 0, 200, 80),
+    "glucose": ("Blood Glucose", 0, 500, 120),
+}
+
+# Model -> {feature index: shared field}; every other feature is its own input
+SHARED_FEATURES = {
+    "heart": {0: "age", 1: "sex"},
+    "diabetes": {1: "glucose", 2: "diastolic_bp", 7: "age"},
+    "kidney": {0: "age", 1: "diastolic_bp", 5: "glucose"},
+    "liver": {0: "age", 1: "sex"},
+}
+
+_pool = ThreadPoolExecutor(SCREENING_WORKERS, thread_name_prefix="screening")
+
+
+def own_inputs(name):
+    """(feature index, label, min, max, default) for the inputs only this model asks for."""
+    spec = MODEL_SPECS[name]
+    return [
+        (j, label, low, high, spec["defaults"][j])
+        for j, (label, low, high) in enumerate(spec["inputs"])
+        if j not in SHARED_FEATURES[name]
+    ]
+
+
+def model_rows(values):
+    """Map the form's values onto each model's feature order.
+
+    values holds the SHARED_INPUTS keys plus (model, feature index) for the rest.
+    """
+    return {
+        name: [values[SHARED_FEATURES[name].get(j, (name, j))] for j in range(len(MODEL_SPECS[name]["inputs"]))]
+        for name in SCREENING_MODELS
+    }
+
+
+def _screen_one(name, row):
+    bundle = get_model(name)
+    disease = MODEL_SPECS[name]["disease"]
+    rules = get_rules(name, bundle.features)
+    fired = rules.evaluate(row)[0]
+    prediction, factors = None, []
+    if fired.any():
+        result = f"⚠️ {alert_text(disease, rules.describe(fired))}"
+    else:
+        from diagnostics.explain import factor_lines, top_factors
+        prediction = cached_predict(bundle, row)
+        result = f"⚠️ {disease} Detected" if prediction == 1 else f"✅ No {disease} Detected"
+        factors = factor_lines(top_factors(bundle, row))
+    inc("predictions_total", disease=disease)
+    return {
+        "model": name,
+        "disease": disease,
+        "row": row,
+        "prediction": prediction,
+        "detected": prediction is None or prediction == 1,
+        "result": result,
+        "factors": factors,
+    }
+
+
+def screen(values):
+    """Results for every screening model, in SCREENING_MODELS order."""
+    rows = model_rows(values)
+    with timed("screening"):
+        futures = [_pool.submit(_screen_one, name, rows[name]) for name in SCREENING_MODELS]
+        return [future.result() for future in futures]
+
+
+def report_text(results):
+    return "\n".join(f"{r['disease']}: {r['result']}" for r in results)
+
+
+def report_factors(results):
+    return [f"{r['disease']} - {line}" for r in results for line in r["factors"]]
@@ -0,0 +1,241 @@
+"""Headless HTTP inference API for the diagnostic models.
+
+    python -m diagnostics.serve [--host 0.0.0.0] [--port 8000] [--workers 4]
+
+Endpoints:
+    GET  /healthz                  liveness
+    GET  /readyz                   200 once every model is loaded and warmed up, else 503
+    GET  /metrics                  Prometheus text (see diagnostics.metrics)
+    GET  /v1/models                tabular models with their feature order
+    POST /v1/predict/<disease>     JSON rows for heart, diabetes, kidney or liver
+    POST /v1/predict/brain         multipart MRI images (field "image" or "images")
+
+A tabular request is either {"inputs": [...]} for one patient or
+{"instances": [...]} for a batch. Each row is a list in the model's feature
+order (the same order as the Streamlit input forms) or an object keyed by
+feature name (case-insensitive). Liver "Gender" is 1 for male, 0 for female.
+"""
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from diagnostics.artifacts import ArtifactError
+from diagnostics.batching import BRAIN_BATCH_TIMEOUT_S, BatcherOverloaded, BatcherTimeout, get_brain_batcher
+from diagnostics.metrics import inc, metrics, timed
+from diagnostics.registry import MODEL_SPECS, get_brain_model, get_model
+from diagnostics.rules import alert_text, get_rules
+from diagnostics.warmup import readiness, start_warmup
+
+# ===================== CONFIG =====================
+# Models are the same artifacts the Streamlit app loads through the registry;
+# inference runs on a thread pool so the event loop keeps accepting requests.
+
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", "4"))
+MAX_ROWS = int(os.environ.get("SERVE_MAX_ROWS", "10000"))
+MAX_IMAGES = int(os.environ.get("SERVE_MAX_IMAGES", "64"))
+
+_executor = None
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _run(fn, *args):
+    return asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+# ===================== TABULAR MODELS =====================
+def _row_values(row, features, index):
+    if isinstance(row, dict):
+        lookup = {str(k).strip().lower(): v for k, v in row.items()}
+        missing = [f for f in features if f.lower() not in lookup]
+        if missing:
+            raise BadRequest(f"Row {index}: missing {', '.join(missing)}")
+        row = [lookup[f.lower()] for f in features]
+    elif not isinstance(row, (list, tuple)):
+        raise BadRequest(f"Row {index}: expected a list or an object")
+    if len(row) != len(features):
+        raise BadRequest(f"Row {index}: expected {len(features)} values, got {len(row)}")
+    try:
+        values = [float(v) for v in row]
+    except (TypeError, ValueError):
+        raise BadRequest(f"Row {index}: values must be numbers") from None
+    if not np.all(np.isfinite(values)):
+        raise BadRequest(f"Row {index}: values must be finite")
+    return values
+
+
+def parse_rows(payload, features):
+    if not isinstance(payload, dict):
+        raise BadRequest("Body must be a JSON object")
+    if "inputs" in payload:
+        rows = [payload["inputs"]]
+    elif "instances" in payload:
+        rows = payload["instances"]
+    else:
+        raise BadRequest('Body needs "inputs" (one row) or "instances" (a list of rows)')
+    if not isinstance(rows, list) or not rows:
+        raise BadRequest('"instances" must be a non-empty list')
+    if len(rows) > MAX_ROWS:
+        raise BadRequest(f"At most {MAX_ROWS} rows per request")
+    return np.array([_row_values(row, features, i) for i, row in enumerate(rows)], dtype=np.float64)
+
+
+def predict_rows(name, X):
+    bundle = get_model(name)
+    disease = MODEL_SPECS[name]["disease"]
+    with timed("scaler_transform", model=name):
+        X_scaled = bundle.scaler.transform(X)
+    with timed("model_predict", model=name):
+        predictions = bundle.model.predict(X_scaled)
+    # The same threshold rules as the app; a fired rule overrides the model
+    rules = get_rules(name, bundle.features)
+    reasons = rules.reasons(rules.evaluate(X))
+    inc("predictions_total", amount=len(X), disease=disease)
+    return {
+        "model": name,
+        "disease": disease,
+        "version": bundle.version,
+        "predictions": [
+            {
+                "prediction": p.item(),
+                "rule_alert": reason or None,
+                "detected": bool(reason) or bool(p == 1),
+                "result": (alert_text(disease, reason) if reason
+                           else f"{disease} Detected" if p == 1 else f"No {disease} Detected"),
+            }
+            for p, reason in zip(predictions, reasons)
+        ],
+    }
+
+
+# ===================== BRAIN MODEL =====================
+def prepare_images(blobs, runtime=None):
+    # Decode and preprocess on the thread pool; returns the shared batcher too.
+    # Tensors come from the same content-hash cache as the Streamlit pages.
+    from diagnostics.brain import preprocess_upload
+    batcher = get_brain_batcher(runtime)
+    input_shape = get_brain_model(runtime).input_shape[1:]
+    names, samples = [], []
+    with timed("preprocess", model="brain"):
+        for name, data in blobs:
+            try:
+                samples.append(preprocess_upload(data, input_shape))
+            except Exception:
+                raise BadRequest(f"{name}: not a readable image") from None
+            names.append(name)
+    return batcher, names, samples
+
+
+async def predict_images(blobs, runtime=None):
+    from diagnostics.brain import summarize
+    batcher, names, samples = await _run(prepare_images, blobs, runtime)
+    # Every image goes through the micro-batcher, so concurrent requests share
+    # forward passes instead of each running its own
+    with timed("model_predict", model="brain"):
+        try:
+            probs = await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(batcher.submit(sample)) for sample in samples)),
+                BRAIN_BATCH_TIMEOUT_S,
+            )
+        except asyncio.TimeoutError:
+            raise BatcherTimeout(f"{batcher.name} gave no result within {BRAIN_BATCH_TIMEOUT_S:g}s") from None
+    inc("predictions_total", amount=len(names), disease="Brain Tumor")
+    rows, aggregate = summarize(names, np.asarray(probs, dtype=np.float64))
+    return {"model": "brain", "predictions": rows, "aggregate": aggregate}
+
+
+# ===================== APP =====================
+def create_app():
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, PlainTextResponse
+    from starlette.routing import Route
+
+    def error(status, message):
+        return JSONResponse({"error": message}, status_code=status)
+
+    async def healthz(request):
+        return JSONResponse({"status": "ok"})
+
+    async def readyz(request):
+        status = readiness()
+        return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+    async def metrics_text(request):
+        return PlainTextResponse(await _run(metrics.render), media_type="text/plain; version=0.0.4")
+
+    async def models(request):
+        bundles = await asyncio.gather(*(_run(get_model, name) for name in MODEL_SPECS))
+        return JSONResponse({
+            b.name: {"disease": MODEL_SPECS[b.name]["disease"], "features": b.features, "version": b.version}
+            for b in bundles
+        })
+
+    async def predict(request):
+        name = request.path_params["disease"]
+        if name == "brain":
+            return await predict_brain(request)
+        if name not in MODEL_SPECS:
+            return error(404, f"Unknown model: {name}")
+        with timed("http_request", route="predict", model=name):
+            try:
+                payload = await request.json()
+            except ValueError:
+                return error(400, "Body must be valid JSON")
+            try:
+                bundle = await _run(get_model, name)
+                X = parse_rows(payload, bundle.features)
+                return JSONResponse(await _run(predict_rows, name, X))
+            except BadRequest as e:
+                return error(400, str(e))
+
+    async def predict_brain(request):
+        with timed("http_request", route="predict", model="brain"):
+            form = await request.form()
+            uploads = form.getlist("images") + form.getlist("image")
+            if not uploads:
+                return error(400, 'Upload images in the "image" or "images" field')
+            if len(uploads) > MAX_IMAGES:
+                return error(400, f"At most {MAX_IMAGES} images per request")
+            blobs = [(u.filename or f"image_{i}", await u.read()) for i, u in enumerate(uploads)]
+            runtime = request.query_params.get("runtime")
+            try:
+                return JSONResponse(await predict_images(blobs, runtime))
+            except (BadRequest, KeyError, FileNotFoundError) as e:
+                # KeyError: unknown runtime; FileNotFoundError: TFLite model not converted
+                return error(400, str(e))
+            except BatcherOverloaded as e:
+                return error(503, str(e))
+            except (ImportError, ArtifactError, OSError) as e:
+                return error(503, f"Brain model unavailable: {e}")
+
+    return Starlette(routes=[
+        Route("/healthz", healthz),
+        Route("/readyz", readyz),
+        Route("/metrics", metrics_text),
+        Route("/v1/models", models),
+        Route("/v1/predict/{disease}", predict, methods=["POST"]),
+    ])
+
+
+def main():
+    global _executor
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SERVE_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="inference threads")
+    args = parser.parse_args()
+
+    import uvicorn
+    _executor = ThreadPoolExecutor(args.workers, thread_name_prefix="inference")
+    # Models warm up in the background; /readyz turns 200 when they're done
+    start_warmup()
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from diagnostics.metrics import timed
+
+# ===================== SPEECH TO TEXT =====================
+# Long dictations are decoded in memory, cut into chunks at the quietest point
+# near a target length and transcribed concurrently. Partial transcripts are
+# yielded as chunks finish. Nothing is written to disk, so there are no temp
+# files to leak, and uploads are capped in size and duration.
+
+SAMPLE_WIDTH = 2                 # chunks are passed to backends as 16-bit mono PCM
+FRAME_SECONDS = 0.03
+TARGET_CHUNK_SECONDS = 25.0
+MAX_CHUNK_SECONDS = 50.0         # Google's free endpoint rejects clips near a minute
+MIN_CHUNK_SECONDS = 5.0
+MAX_AUDIO_SECONDS = float(os.environ.get("SPEECH_MAX_AUDIO_SECONDS", "3600"))
+MAX_UPLOAD_BYTES = int(os.environ.get("SPEECH_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+MAX_WORKERS = int(os.environ.get("SPEECH_MAX_WORKERS", "4"))
+
+
+class AudioTooLargeError(ValueError):
+    pass
+
+
+class TranscriptionError(RuntimeError):
+    pass
+
+
+# ===================== DECODING & CHUNKING =====================
+def read_wav(file):
+    if getattr(file, "size", 0) > MAX_UPLOAD_BYTES:
+        raise AudioTooLargeError(f"Upload is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    try:
+        with wave.open(file, "rb") as wav:
+            rate, width, channels, n = wav.getframerate(), wav.getsampwidth(), wav.getnchannels(), wav.getnframes()
+            if n / rate > MAX_AUDIO_SECONDS:
+                raise AudioTooLargeError(f"Audio is longer than {MAX_AUDIO_SECONDS / 60:.0f} minutes")
+            raw = wav.readframes(n)
+    except wave.Error as e:
+        # Not RIFF/WAVE, or a format the wave module can't decode (e.g. IEEE float)
+        raise ValueError(f"Unsupported or corrupt WAV file: {e}") from e
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2")
+    elif width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        samples = ((b[:, 2].astype(np.int8).astype(np.int16) << 8) | b[:, 1]).astype(np.int16)
+    elif width == 4:
+        samples = (np.frombuffer(raw, dtype="<i4") >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"Unsupported sample width: {width} bytes")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+
+def split_on_silence(samples, rate, target=TARGET_CHUNK_SECONDS,
+                     max_len=MAX_CHUNK_SECONDS, min_len=MIN_CHUNK_SECONDS):
+    # Returns (start, end) sample ranges; each cut lands on the quietest frame
+    # between min_len and max_len, preferring frames close to the target
+    frame = max(1, int(rate * FRAME_SECONDS))
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return [(0, len(samples))] if len(samples) else []
+    energy = np.sqrt(np.mean(
+        samples[:n_frames * frame].astype(np.float64).reshape(n_frames, frame) ** 2, axis=1
+    ))
+    # Smooth over ~150 ms so cuts land inside pauses rather than on their edges
+    energy = np.convolve(energy, np.ones(5) / 5, mode="same")
+
+    to_frames = rate / frame
+    chunks, start = [], 0
+    while start < n_frames:
+        if (n_frames - start) / to_frames <= max_len:
+            chunks.append((start * frame, len(samples)))
+            break
+        lo = start + int(min_len * to_frames)
+        hi = start + int(max_len * to_frames)
+        window = energy[lo:hi]
+        # Nudge ties towards the target length
+        distance = np.abs(np.arange(lo, hi) - (start + target * to_frames)) / (hi - lo)
+        cut = lo + int(np.argmin(window / (window.max() + 1e-9) + 0.1 * distance))
+        chunks.append((start * frame, cut * frame))
+        start = cut
+    return chunks
+
+
+# ===================== BACKENDS =====================
+class SpeechBackend:
+    name = "base"
+
+    def transcribe(self, pcm, rate):
+        raise NotImplementedError
+
+
+class GoogleBackend(SpeechBackend):
+    name = "google"
+
+    def __init__(self, language="en-US"):
+        import speech_recognition as sr
+        self._sr = sr
+        self.language = language
+
+    def transcribe(self, pcm, rate):
+        sr = self._sr
+        try:
+            return sr.Recognizer().recognize_google(sr.AudioData(pcm, rate, SAMPLE_WIDTH), language=self.language)
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            raise TranscriptionError(f"API Error: {e}") from e
+
+
+class SphinxBackend(SpeechBackend):
+    # Offline, needs the pocketsphinx package
+    name = "sphinx"
+
+    def __init__(self):
+        import speech_recognition as sr
+        self._sr = sr
+
+    def transcribe(self, pcm, rate):
+        sr = self._sr
+        try:
+            return sr.Recognizer().recognize_sphinx(sr.AudioData(pcm, rate, SAMPLE_WIDTH))
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            raise TranscriptionError(str(e)) from e
+
+
+class StubBackend(SpeechBackend):
+    # Deterministic local stand-in for development and tests; no network
+    name = "stub"
+
+    def transcribe(self, pcm, rate):
+        seconds = len(pcm) / (rate * SAMPLE_WIDTH)
+        return f"[{seconds:.1f}s of audio]"
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "sphinx": SphinxBackend,
+    "stub": StubBackend,
+}
+
+
+def get_backend(name, **kwargs):
+    if name not in BACKENDS:
+        raise KeyError(f"Unknown speech backend: {name}")
+    return BACKENDS[name](**kwargs)
+
+
+# ===================== TRANSCRIPTION =====================
+def transcribe_chunks(samples, rate, backend, chunks=None, max_workers=MAX_WORKERS):
+    """Yield (index, total, text) for each chunk as soon as it is transcribed."""
+    chunks = split_on_silence(samples, rate) if chunks is None else chunks
+
+    def transcribe(pcm):
+        with timed("transcribe_chunk", backend=backend.name):
+            return backend.transcribe(pcm, rate)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            pool.submit(transcribe, samples[start:end].tobytes()): i
+            for i, (start, end) in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            yield futures[future], len(chunks), future.result()
+    finally:
+        # A failed chunk or a stopped run (generator closed) must not wait
+        # for every remaining chunk to be transcribed
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def join_transcript(parts):
+    return " ".join(text for _, text in sorted(parts.items()) if text)
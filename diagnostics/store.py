@@ -0,0 +1,165 @@
+import hashlib
+import hmac
+import json
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# ===================== PERSISTENT STORE =====================
+# Users, appointments and prediction history live in one SQLite file in WAL
+# mode, so they survive restarts and are shared by every replica on the host.
+# Connections come from a small pool because Streamlit runs each session (and
+# each rerun) on its own thread.
+
+DB_PATH = os.environ.get("DIAGNOSTICS_DB_PATH", "data/diagnostics.db")
+POOL_SIZE = int(os.environ.get("DIAGNOSTICS_DB_POOL_SIZE", "4"))
+PASSWORD_ITERATIONS = 200_000
+PAGE_SIZE = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username      TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    salt          TEXT NOT NULL,
+    created_at    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    username   TEXT NOT NULL REFERENCES users(username),
+    disease    TEXT NOT NULL,
+    doctor     TEXT NOT NULL,
+    link       TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_user_time ON appointments(username, created_at);
+CREATE TABLE IF NOT EXISTS predictions (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    username   TEXT,
+    disease    TEXT NOT NULL,
+    result     TEXT NOT NULL,
+    inputs     TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_user_time ON predictions(username, created_at);
+"""
+
+
+def _now():
+    return datetime.now().isoformat(sep=" ", timespec="seconds")
+
+
+def _hash_password(password, salt):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), PASSWORD_ITERATIONS).hex()
+
+
+class Store:
+    def __init__(self, path=DB_PATH, pool_size=POOL_SIZE):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._pool = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _fetch(self, sql, params=()):
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def _scalar(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    # ===================== USERS =====================
+    def create_user(self, username, password):
+        salt = secrets.token_hex(16)
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT INTO users (username, password_hash, salt, created_at) VALUES (?, ?, ?, ?)",
+                    (username, _hash_password(password, salt), salt, _now()),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def user_exists(self, username):
+        return self._scalar("SELECT COUNT(*) FROM users WHERE username = ?", (username,)) > 0
+
+    def verify_user(self, username, password):
+        rows = self._fetch("SELECT password_hash, salt FROM users WHERE username = ?", (username,))
+        if not rows:
+            return False
+        return hmac.compare_digest(rows[0]["password_hash"], _hash_password(password, rows[0]["salt"]))
+
+    # ===================== APPOINTMENTS =====================
+    def add_appointment(self, username, disease, doctor, link):
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO appointments (username, disease, doctor, link, created_at) VALUES (?, ?, ?, ?, ?)",
+                (username, disease, doctor, link, _now()),
+            )
+
+    def appointments(self, username, limit=PAGE_SIZE, offset=0):
+        return self._fetch(
+            "SELECT disease, doctor, link, created_at FROM appointments WHERE username = ? "
+            "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (username, limit, offset),
+        )
+
+    def count_appointments(self, username):
+        return self._scalar("SELECT COUNT(*) FROM appointments WHERE username = ?", (username,))
+
+    # ===================== PREDICTIONS =====================
+    def add_prediction(self, username, disease, result, inputs=None):
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO predictions (username, disease, result, inputs, created_at) VALUES (?, ?, ?, ?, ?)",
+                (username, disease, result, json.dumps(inputs) if inputs is not None else None, _now()),
+            )
+
+    def predictions(self, username, limit=PAGE_SIZE, offset=0):
+        rows = self._fetch(
+            "SELECT disease, result, inputs, created_at FROM predictions WHERE username = ? "
+            "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (username, limit, offset),
+        )
+        for row in rows:
+            row["inputs"] = json.loads(row["inputs"]) if row["inputs"] else None
+        return rows
+
+    def count_predictions(self, username):
+        return self._scalar("SELECT COUNT(*) FROM predictions WHERE username = ?", (username,))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = Store()
+        return _store
@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from diagnostics.metrics import observe
+
+# ===================== WARM-UP =====================
+# At startup every model in WARMUP_MODELS is loaded on its own background
+# thread and pushed through one dummy prediction, so the first user doesn't pay
+# for unpickling (or, with brain listed, the TensorFlow graph build and the
+# model download). The
+# per-model state is what readiness() reports: the home dashboard shows it,
+# the HTTP API and the METRICS_PORT exporter answer /readyz from it for load
+# balancers, and WARMUP_STATUS_FILE gets a JSON copy for process managers.
+
+# Comma-separated; every listed model must warm up before the replica is ready.
+# Brain is opt-in (add "brain"): it needs TensorFlow and the model download,
+# and a replica without them would otherwise never report ready.
+WARMUP_MODELS = [m.strip() for m in os.environ.get("WARMUP_MODELS", "heart,diabetes,kidney,liver").split(",") if m.strip()]
+WARMUP_STATUS_FILE = os.environ.get("WARMUP_STATUS_FILE")
+
+PENDING, LOADING, WARMING, READY, FAILED = "pending", "loading", "warming", "ready", "failed"
+
+_status = {}
+_status_lock = threading.Lock()
+_started = False
+
+
+def _set(name, state, **extra):
+    with _status_lock:
+        _status[name] = {**_status.get(name, {}), "state": state, **extra}
+        snapshot = _snapshot()
+    if WARMUP_STATUS_FILE:
+        _write_status(WARMUP_STATUS_FILE, snapshot)
+
+
+def _write_status(path, snapshot):
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _snapshot():
+    models = {name: dict(status) for name, status in _status.items()}
+    return {
+        "ready": _started and all(s["state"] == READY for s in models.values()),
+        "models": models,
+        "updated_at": time.time(),
+    }
+
+
+def readiness():
+    with _status_lock:
+        return _snapshot()
+
+
+def _warm_tabular(name):
+    from diagnostics.registry import get_model
+    bundle = get_model(name)
+    _set(name, WARMING)
+    X = np.zeros((1, len(bundle.features)))
+    bundle.model.predict(bundle.scaler.transform(X))
+
+
+def _warm_brain(runtime=None):
+    from diagnostics.registry import get_brain_model
+    model = get_brain_model(runtime)
+    _set("brain", WARMING)
+    # The first predict builds the graph / allocates tensors
+    model.predict(np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float32), verbose=0)
+
+
+def _warm(name):
+    _set(name, LOADING)
+    start = time.perf_counter()
+    try:
+        if name == "brain":
+            _warm_brain()
+        else:
+            _warm_tabular(name)
+    except Exception as e:
+        _set(name, FAILED, seconds=round(time.perf_counter() - start, 3), error=f"{type(e).__name__}: {e}")
+        return
+    seconds = time.perf_counter() - start
+    observe("warmup", seconds, model=name)
+    _set(name, READY, seconds=round(seconds, 3))
+
+
+def start_warmup(models=None):
+    # Safe to call on every rerun; the threads start once per process
+    global _started
+    models = WARMUP_MODELS if models is None else models
+    with _status_lock:
+        if _started:
+            return
+        _started = True
+        for name in models:
+            _status[name] = {"state": PENDING}
+    for name in models:
+        threading.Thread(target=_warm, args=(name,), name=f"warmup-{name}", daemon=True).start()
+
+
+def wait_until_ready(timeout=None):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        status = readiness()
+        states = [s["state"] for s in status["models"].values()]
+        if status["ready"] or (states and all(s in (READY, FAILED) for s in states)):
+            return status
+        if deadline is not None and time.monotonic() >= deadline:
+            return status
+        time.sleep(0.05)
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+
+from diagnostics.cache import LRUCache
+from diagnostics.metrics import timed
+
+# ===================== WHAT-IF SWEEPS =====================
+# Risk for one patient while one or two features move across their input
+# ranges. Every grid point is a copy of the patient's row with the swept
+# columns replaced, and the whole grid goes through a single scaler + model
+# call. Fused forests first fix the splits on the held features, so a curve
+# costs about as much as one prediction and a heatmap a few of them.
+
+# Points per swept feature for a risk curve and for each axis of a heatmap
+WHATIF_GRID_POINTS = int(os.environ.get("WHATIF_GRID_POINTS", "50"))
+WHATIF_HEATMAP_POINTS = int(os.environ.get("WHATIF_HEATMAP_POINTS", "25"))
+WHATIF_CACHE_SIZE = int(os.environ.get("WHATIF_CACHE_SIZE", "256"))
+
+whatif_cache = LRUCache(WHATIF_CACHE_SIZE)
+
+
+def grid_values(low, high, points=WHATIF_GRID_POINTS):
+    values = np.linspace(low, high, points)
+    if isinstance(low, int) and isinstance(high, int):
+        # Integer inputs only take whole values
+        values = np.unique(np.round(values))
+    return values
+
+
+def sweep_rows(row, columns, grids):
+    """Patient row repeated over the meshgrid of `grids` in `columns`."""
+    mesh = np.meshgrid(*grids, indexing="ij")
+    X = np.repeat(np.asarray(row, dtype=np.float64).reshape(1, -1), mesh[0].size, axis=0)
+    for column, values in zip(columns, mesh):
+        X[:, column] = values.ravel()
+    return X
+
+
+def risk_scores(model, scaler, X):
+    # Probability of the positive class; models without predict_proba fall
+    # back to their 0/1 prediction
+    X_scaled = scaler.transform(X)
+    if hasattr(model, "predict_proba"):
+        classes = list(model.classes_)
+        positive = classes.index(1) if 1 in classes else len(classes) - 1
+        return model.predict_proba(X_scaled)[:, positive]
+    return (model.predict(X_scaled) == 1).astype(np.float64)
+
+
+def what_if(bundle, row, columns, ranges, points=WHATIF_GRID_POINTS):
+    """Grids for the swept columns and the risk over them, shaped like the grid."""
+    key = (bundle.version, tuple(float(v) for v in row), tuple(columns), tuple(ranges), points)
+
+    def compute():
+        grids = [grid_values(low, high, points) for low, high in ranges]
+        X = sweep_rows(row, columns, grids)
+        with timed("whatif", model=bundle.name):
+            model = bundle.model
+            if hasattr(model, "fix_features"):
+                # Fused forests decide the splits on the held features once
+                model = model.fix_features(bundle.scaler.transform(np.reshape(row, (1, -1)))[0], columns)
+            risk = risk_scores(model, bundle.scaler, X)
+        return grids, risk.reshape([len(g) for g in grids])
+
+    return whatif_cache.get_or_compute(key, compute)
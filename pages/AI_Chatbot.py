@@ -1,5 +1,8 @@
 import streamlit as st
-import google.generativeai as genai
+
+from diagnostics.chat import (CHAT_BACKEND_URL, RENDER_WINDOW, ChatHistory,
+                              get_chat_backend, stream_reply)
+from diagnostics.metrics import start_exporters
 
 # ------------------- Page Config -------------------
 st.set_page_config(page_title="AI Health Assistant", page_icon="🤖")
@@ -10,26 +13,39 @@ st.write("Ask questions about symptoms, diseases, reports, or prevention.")
 # ------------------- Load API Key -------------------
 # Make sure you have .streamlit/secrets.toml with:
 # GEMINI_API_KEY = "YOUR_ACTUAL_API_KEY_HERE"
+# (or set CHAT_BACKEND_URL to use a local model server such as scripts/fake_chat_server.py)
 api_key = st.secrets.get("GEMINI_API_KEY")
-if not api_key:
+if not api_key and not CHAT_BACKEND_URL:
     st.error("GEMINI_API_KEY not found in secrets.toml")
     st.stop()
 
-# ------------------- Configure Gemini -------------------
-genai.configure(api_key=api_key)
+# Prometheus endpoint / file, if METRICS_PORT or METRICS_FILE is set (once per process)
+start_exporters()
 
-# Use a valid model
-model = genai.GenerativeModel("models/gemini-2.0-flash")
+# ------------------- Configure Backend -------------------
+# Shared by all sessions; the conversation itself is sent with every request
+backend = get_chat_backend(api_key)
 
 # ------------------- Initialize Chat -------------------
-if "chat" not in st.session_state:
-    st.session_state.chat = model.start_chat(history=[])
-
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+# ChatHistory keeps the request context within a token budget and bounds
+# what the session stores
+if "history" not in st.session_state:
+    st.session_state.history = ChatHistory()
+if "render_window" not in st.session_state:
+    st.session_state.render_window = RENDER_WINDOW
+history = st.session_state.history
 
 # ------------------- Display Chat History -------------------
-for msg in st.session_state.messages:
+# Only the most recent messages are rendered; older ones load on demand
+hidden = len(history.messages) - st.session_state.render_window
+if hidden > 0:
+    if st.button(f"⬆️ Load older messages ({hidden} hidden)", key="load_older"):
+        st.session_state.render_window += RENDER_WINDOW
+        st.rerun()
+elif history.dropped:
+    st.caption(f"{history.dropped} older messages were summarized and are no longer shown.")
+
+for msg in history.window(st.session_state.render_window):
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
@@ -38,19 +54,24 @@ user_input = st.chat_input("Ask your health question...")
 
 if user_input:
     # Show user message
-    st.session_state.messages.append({"role": "user", "content": user_input})
+    history.append("user", user_input)
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    # Send message to Gemini
-    try:
-        response = st.session_state.chat.send_message(user_input)
-        reply = response.text
-    except Exception as e:
-        # Catch any error (quota, 403, 404, etc.)
-        reply = f"⚠️ Error: {e}"
-
-    # Show assistant response
-    st.session_state.messages.append({"role": "assistant", "content": reply})
+    # Stream the reply token by token (common opening questions come from the FAQ cache)
     with st.chat_message("assistant"):
-        st.markdown(reply)
+        collected = []
+        try:
+            st.write_stream(stream_reply(backend, history.context(), collected))
+            reply = "".join(collected)
+        except Exception as e:
+            # Catch any error (quota, 403, 404, etc.). It is only shown, never
+            # stored, so it isn't sent back to the model with the next question
+            reply = None
+            st.error(f"⚠️ Error: {e}. Please ask again.")
+
+    if reply is None:
+        # Drop the unanswered question too, so user/assistant turns keep alternating
+        history.discard_last()
+    else:
+        history.append("assistant", reply)
@@ -1,69 +1,66 @@
 import streamlit as st
-import numpy as np
-import pickle
+
+from diagnostics.batch import batch_scoring_section
+from diagnostics.cache import cached_predict
+from diagnostics.explain import attribution_section
+from diagnostics.registry import get_model
+from diagnostics.rules import get_rules
 
 st.set_page_config(page_title="Heart Disease Prediction", layout="centered")
 st.title("❤️ Heart Disease Prediction (13 Features)")
 
-# ================= SAFE MODEL LOADER =================
-@st.cache_resource
-def load_model():
-    with open("models/heart_model.pkl", "rb") as f:
-        data = pickle.load(f)
-    # Handle both tuple and dict formats
-    if isinstance(data, tuple):
-        model, scaler = data
-        features = [
-            "Age", "Sex", "Chest pain type", "BP", "Cholesterol",
-            "FBS over 120", "EKG results", "Max HR", "Exercise angina",
-            "ST depression", "Slope of ST", "Number of vessels fluro", "Thallium"
-        ]
-    else:
-        model = data["model"]
-        scaler = data["scaler"]
-        features = data["features"]
-    return model, scaler, features
-
-model, scaler, FEATURES = load_model()
+# ================= SHARED MODEL REGISTRY =================
+bundle = get_model("heart")
+model, scaler, FEATURES = bundle.model, bundle.scaler, bundle.features
+rules = get_rules("heart", FEATURES)
 
 # ================= INPUTS =================
 st.subheader("Enter Patient Details")
 
-age = st.number_input("Age", 0, 120, value=52)
-sex = st.selectbox("Sex (0 = Female, 1 = Male)", [0, 1])
-cp = st.number_input("Chest Pain Type (0–3)", 0, 3, value=0)
-trestbps = st.number_input("Resting Blood Pressure (BP)", 80, 200, value=120)
-chol = st.number_input("Cholesterol", 100, 600, value=240)
-fbs = st.selectbox("Fasting Blood Sugar > 120 mg/dl", [0, 1])
-restecg = st.number_input("Resting ECG Results (0–2)", 0, 2, value=1)
-thalach = st.number_input("Maximum Heart Rate Achieved", 60, 250, value=150)
-exang = st.selectbox("Exercise Induced Angina", [0, 1])
-oldpeak = st.number_input("ST Depression (Oldpeak)", 0.0, 10.0, value=1.2)
-slope = st.number_input("Slope of ST Segment (0–2)", 0, 2, value=1)
-ca = st.number_input("Number of Major Vessels (0–3)", 0, 3, value=0)
-thal = st.number_input("Thalassemia (1 = normal, 2 = fixed defect, 3 = reversible defect)", 1, 3, value=2)
+# Batched in a form, so editing a field doesn't rerun the page
+with st.form("heart_form"):
+    age = st.number_input("Age", 0, 120, value=52)
+    sex = st.selectbox("Sex (0 = Female, 1 = Male)", [0, 1])
+    cp = st.number_input("Chest Pain Type (0–3)", 0, 3, value=0)
+    trestbps = st.number_input("Resting Blood Pressure (BP)", 80, 200, value=120)
+    chol = st.number_input("Cholesterol", 100, 600, value=240)
+    fbs = st.selectbox("Fasting Blood Sugar > 120 mg/dl", [0, 1])
+    restecg = st.number_input("Resting ECG Results (0–2)", 0, 2, value=1)
+    thalach = st.number_input("Maximum Heart Rate Achieved", 60, 250, value=150)
+    exang = st.selectbox("Exercise Induced Angina", [0, 1])
+    oldpeak = st.number_input("ST Depression (Oldpeak)", 0.0, 10.0, value=1.2)
+    slope = st.number_input("Slope of ST Segment (0–2)", 0, 2, value=1)
+    ca = st.number_input("Number of Major Vessels (0–3)", 0, 3, value=0)
+    thal = st.number_input("Thalassemia (1 = normal, 2 = fixed defect, 3 = reversible defect)", 1, 3, value=2)
+    submitted = st.form_submit_button("🔍 Predict Heart Disease")
 
 # ================= PREDICTION =================
-if st.button("🔍 Predict Heart Disease"):
+if submitted:
     try:
-        # Quick rule-based alert for obvious risk
-        if chol > 300 or trestbps > 160 or thalach < 100:
-            st.error("⚠️ Possible Heart Disease Detected (Rule-Based Alert)")
+        row = [age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal]
+
+        # Quick rule-based alert for obvious risk (thresholds live in diagnostics/rules.py)
+        fired = rules.evaluate(row)[0]
+        if fired.any():
+            st.error(f"⚠️ Possible Heart Disease Detected (Rule-Based Alert: {rules.describe(fired)})")
         else:
-            # Prepare input for model
-            X_input = np.array([[age, sex, cp, trestbps, chol, fbs, restecg,
-                                 thalach, exang, oldpeak, slope, ca, thal]])
-            X_scaled = scaler.transform(X_input)
-            prediction = model.predict(X_scaled)[0]
+            # Prepare input for model (identical inputs hit the shared prediction cache)
+            prediction = cached_predict(bundle, row)
 
             if prediction == 1:
                 st.error("⚠️ Heart Disease Detected")
             else:
                 st.success("✅ No Heart Disease Detected")
 
+            attribution_section(bundle, row)
+
     except Exception as e:
         st.error("Prediction failed")
         st.code(str(e))
 
+# ================= BATCH SCORING =================
+with st.expander("📂 Batch Scoring (CSV / Parquet)"):
+    batch_scoring_section("Heart Disease", model, scaler, FEATURES, rules=rules)
+
 st.markdown("---")
 st.markdown("Made with ❤️ by your ML buddy")
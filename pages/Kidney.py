@@ -1,56 +1,63 @@
 import streamlit as st
-import numpy as np
-import pickle
+
+from diagnostics.batch import batch_scoring_section
+from diagnostics.cache import cached_predict
+from diagnostics.explain import attribution_section
+from diagnostics.registry import get_model
+from diagnostics.rules import get_rules
 
 st.set_page_config(page_title="Kidney Disease Prediction", layout="centered")
 st.title("🩺 Kidney Disease Prediction (10 Features)")
 
-# ================= SAFE MODEL LOADER =================
-@st.cache_resource
-def load_model():
-    with open("models/kidney_10f_model.pkl", "rb") as f:
-        data = pickle.load(f)
-    model = data["model"]
-    scaler = data["scaler"]
-    features = data["features"]
-    return model, scaler, features
-
-model, scaler, FEATURES = load_model()
+# ================= SHARED MODEL REGISTRY =================
+bundle = get_model("kidney")
+model, scaler, FEATURES = bundle.model, bundle.scaler, bundle.features
+rules = get_rules("kidney", FEATURES)
 
 # ================= INPUTS =================
 st.subheader("Enter Patient Details")
 
-age = st.number_input("Age", 0, 120, value=45)
-bp = st.number_input("Blood Pressure (BP)", 0, 200, value=80)
-sg = st.number_input("Specific Gravity (SG)", 1.0, 1.05, value=1.020)
-al = st.number_input("Albumin (AL)", 0, 5, value=0)
-su = st.number_input("Sugar (SU)", 0, 5, value=0)
-bgr = st.number_input("Blood Glucose Random (BGR)", 0, 500, value=110)
-bu = st.number_input("Blood Urea (BU)", 0, 200, value=25)
-sc = st.number_input("Serum Creatinine (SC)", 0.0, 20.0, value=1.0)
-hemo = st.number_input("Hemoglobin (HEMO)", 0.0, 20.0, value=15.2)
-pcv = st.number_input("Packed Cell Volume (PCV)", 0, 60, value=44)
+# Batched in a form, so editing a field doesn't rerun the page
+with st.form("kidney_form"):
+    age = st.number_input("Age", 0, 120, value=45)
+    bp = st.number_input("Blood Pressure (BP)", 0, 200, value=80)
+    sg = st.number_input("Specific Gravity (SG)", 1.0, 1.05, value=1.020)
+    al = st.number_input("Albumin (AL)", 0, 5, value=0)
+    su = st.number_input("Sugar (SU)", 0, 5, value=0)
+    bgr = st.number_input("Blood Glucose Random (BGR)", 0, 500, value=110)
+    bu = st.number_input("Blood Urea (BU)", 0, 200, value=25)
+    sc = st.number_input("Serum Creatinine (SC)", 0.0, 20.0, value=1.0)
+    hemo = st.number_input("Hemoglobin (HEMO)", 0.0, 20.0, value=15.2)
+    pcv = st.number_input("Packed Cell Volume (PCV)", 0, 60, value=44)
+    submitted = st.form_submit_button("🔍 Predict Kidney Disease")
 
 # ================= PREDICTION =================
-if st.button("🔍 Predict Kidney Disease"):
+if submitted:
     try:
-        # Rule-based safety check for obvious CKD
-        if bu > 90 or sc > 5 or hemo < 10 or pcv < 28:
-            st.error("⚠️ Chronic Kidney Disease Detected (Rule-Based Alert)")
+        row = [age, bp, sg, al, su, bgr, bu, sc, hemo, pcv]
+
+        # Rule-based safety check for obvious CKD (thresholds live in diagnostics/rules.py)
+        fired = rules.evaluate(row)[0]
+        if fired.any():
+            st.error(f"⚠️ Chronic Kidney Disease Detected (Rule-Based Alert: {rules.describe(fired)})")
         else:
-            # Prepare input for model
-            X_input = np.array([[age, bp, sg, al, su, bgr, bu, sc, hemo, pcv]])
-            X_scaled = scaler.transform(X_input)
-            prediction = model.predict(X_scaled)[0]
+            # Prepare input for model (identical inputs hit the shared prediction cache)
+            prediction = cached_predict(bundle, row)
 
             if prediction == 1:
                 st.error("⚠️ Chronic Kidney Disease Detected")
             else:
                 st.success("✅ No Chronic Kidney Disease Detected")
 
+            attribution_section(bundle, row)
+
     except Exception as e:
         st.error("Prediction failed")
         st.code(str(e))
 
+# ================= BATCH SCORING =================
+with st.expander("📂 Batch Scoring (CSV / Parquet)"):
+    batch_scoring_section("Chronic Kidney Disease", model, scaler, FEATURES, rules=rules)
+
 st.markdown("---")
 st.markdown("Made with ❤️ by your ML buddy")
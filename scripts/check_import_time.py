@@ -0,0 +1,71 @@
+"""Import-time budget for the Signup/Login path of app.py.
+
+Runs app.py once in Streamlit bare mode under ``python -X importtime`` (a
+fresh session lands on the Signup screen), then fails if the total import
+time exceeds the budget or if any heavy dependency was imported.
+
+    python scripts/check_import_time.py [--budget-ms 1500] [--top 15]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load once the Brain, Speech, PDF or batch paths are used
+FORBIDDEN = ["tensorflow", "keras", "speech_recognition", "fpdf", "PIL", "requests", "pandas"]
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "import runpy; runpy.run_path('app.py', run_name='__main__')"],
+        cwd=ROOT, capture_output=True, text=True,
+        # Background model warm-up would otherwise race the measured imports
+        env={**os.environ, "WARMUP_MODELS": ""},
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit("app.py failed to run in bare mode")
+
+    total_us, top_level, modules = 0, [], set()
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        total_us += int(self_us)
+        modules.add(name)
+        if len(indent) == 1:
+            top_level.append((int(cumulative_us), name))
+    return total_us, sorted(top_level, reverse=True), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total_us, top_level, modules = measure()
+    print(f"Total import time: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for cumulative_us, name in top_level[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    leaked = sorted(m for m in FORBIDDEN if any(x == m or x.startswith(m + ".") for x in modules))
+    failed = False
+    if leaked:
+        print("Heavy modules imported on the login path: " + ", ".join(leaked))
+        failed = True
+    if total_us / 1000 > args.budget_ms:
+        print("Import-time budget exceeded")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
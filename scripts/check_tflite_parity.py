@@ -0,0 +1,66 @@
+"""Compare the quantized TFLite brain model against the Keras model.
+
+    python scripts/check_tflite_parity.py --images data/mri/holdout
+
+Images may sit in ``yes/`` and ``no/`` subfolders (tumor / no tumor); when
+they do, accuracy is reported for both runtimes. The check fails when the
+two runtimes disagree on more than ``--max-disagreement`` of the images or
+TFLite accuracy drops by more than ``--max-accuracy-drop``.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from diagnostics import registry  # noqa: E402
+from diagnostics.brain import THRESHOLD, iter_image_dir, predict_images, preprocess_images  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", required=True)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-disagreement", type=float, default=0.01)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    args = parser.parse_args()
+
+    images_dir = os.path.abspath(args.images)
+    os.chdir(ROOT)
+    keras_model = registry.get_brain_model("keras")
+    tflite_model = registry.get_brain_model("tflite")
+
+    names, images, labels = [], [], []
+    for name, image, label in iter_image_dir(images_dir):
+        names.append(name)
+        images.append(image)
+        labels.append(label)
+    if not images:
+        raise SystemExit(f"No images found in {images_dir}")
+
+    batch = preprocess_images(images, keras_model.input_shape[1:])
+    keras_probs = predict_images(keras_model, batch, args.batch_size)
+    tflite_probs = predict_images(tflite_model, batch, args.batch_size)
+
+    keras_pred = keras_probs > THRESHOLD
+    tflite_pred = tflite_probs > THRESHOLD
+    disagreement = float(np.mean(keras_pred != tflite_pred))
+    print(f"Images: {len(images)}")
+    print(f"Max |p_keras - p_tflite|: {np.abs(keras_probs - tflite_probs).max():.4f}")
+    print(f"Label disagreement: {disagreement:.2%}")
+
+    failed = disagreement > args.max_disagreement
+    if all(label is not None for label in labels):
+        truth = np.array(labels, dtype=bool)
+        keras_acc = float(np.mean(keras_pred == truth))
+        tflite_acc = float(np.mean(tflite_pred == truth))
+        print(f"Accuracy: keras {keras_acc:.2%}, tflite {tflite_acc:.2%}")
+        failed = failed or keras_acc - tflite_acc > args.max_accuracy_drop
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Convert the Keras brain tumor model into a quantized TFLite flatbuffer.
+
+    python scripts/convert_brain_tflite.py --quantize float16
+    python scripts/convert_brain_tflite.py --quantize int8 --calibration-dir data/mri/train
+
+``dynamic`` stores int8 weights with float activations, ``float16`` halves the
+weights, and ``int8`` quantizes weights and activations using a representative
+sample of MRI images for calibration.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from diagnostics import registry  # noqa: E402
+from diagnostics.brain import iter_image_dir, preprocess_image  # noqa: E402
+
+
+def representative_dataset(directory, input_shape, limit):
+    def generator():
+        for i, (_, image, _) in enumerate(iter_image_dir(directory)):
+            if i >= limit:
+                break
+            yield [preprocess_image(image, input_shape)[None].astype("float32")]
+    return generator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quantize", choices=["dynamic", "float16", "int8"], default="float16")
+    parser.add_argument("--calibration-dir", help="MRI images used to calibrate int8 activations")
+    parser.add_argument("--calibration-limit", type=int, default=200)
+    parser.add_argument("--output", default=registry.BRAIN_TFLITE_PATH)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    os.chdir(ROOT)
+    model = registry.get_brain_model("keras")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if args.quantize == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif args.quantize == "int8":
+        if not args.calibration_dir:
+            parser.error("--quantize int8 needs --calibration-dir")
+        converter.representative_dataset = representative_dataset(
+            args.calibration_dir, model.input_shape[1:], args.calibration_limit
+        )
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    flatbuffer = converter.convert()
+    tmp_path = args.output + ".part"
+    with open(tmp_path, "wb") as f:
+        f.write(flatbuffer)
+    os.replace(tmp_path, args.output)
+
+    keras_bytes = os.path.getsize(registry.BRAIN_MODEL_PATH)
+    print(f"Wrote {args.output}: {len(flatbuffer) / 1e6:.1f} MB "
+          f"({len(flatbuffer) / keras_bytes:.0%} of the .h5)")
+
+
+if __name__ == "__main__":
+    main()
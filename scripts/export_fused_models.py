@@ -0,0 +1,87 @@
+"""Compile each models/*.pkl (model + scaler) into a fused NumPy predictor.
+
+    python scripts/export_fused_models.py [heart diabetes kidney liver] [--format mmap]
+
+Writes the memory-mapped models/<name>.mmap/ directory (one .npy per array
+plus manifest.json) and/or a single-file models/<name>.fused.npz next to
+each pickle. Only the mmap exports are committed; --format npz is for hosts
+that want one file to copy around. Every export is checked for identical
+predictions on a random sample, and its size and single-row latency are
+reported against the sklearn pipeline. The registry picks the exports up
+automatically (mmap first) while their recorded pickle hash matches. Also
+writes models/<name>.background.npy, the reference patients for feature
+attributions.
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from diagnostics import registry  # noqa: E402
+from diagnostics.explain import build_background  # noqa: E402
+from diagnostics.fused import compile_model, load_fused, load_mmap, save_fused, save_mmap  # noqa: E402
+
+
+def _per_call_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _size_mb(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+    return os.path.getsize(path) / 1e6
+
+
+def export(name, samples, formats):
+    bundle = registry._load_pickle_bundle(name)
+    compiled = compile_model(bundle.model, bundle.scaler)
+    np.save(registry.background_path(name), build_background(bundle.scaler, registry.MODEL_SPECS[name]["inputs"]))
+
+    scaler = bundle.scaler
+    rng = np.random.default_rng(0)
+    X = rng.normal(scaler.mean_, scaler.scale_ * 1.5, size=(samples, len(scaler.mean_)))
+    expected = bundle.model.predict(scaler.transform(X))
+    row = X[:1]
+    sklearn_ms = _per_call_ms(lambda: bundle.model.predict(scaler.transform(row)), 50)
+
+    writers = {
+        "npz": (registry.fused_path(name), save_fused, load_fused, os.remove),
+        "mmap": (registry.mmap_path(name), save_mmap, load_mmap, shutil.rmtree),
+    }
+    for fmt in formats:
+        path, save, load, remove = writers[fmt]
+        save(path, compiled, bundle.features, bundle.path)
+        fused, _, _ = load(path)
+        if not np.array_equal(fused.predict(X), expected):
+            remove(path)
+            raise SystemExit(f"{name}: {fmt} predictions differ from sklearn; export removed")
+        fused_ms = _per_call_ms(lambda: fused.predict(row), 500)
+        print(f"{name:9s} {fmt:4s} {_size_mb(bundle.path):5.2f} MB -> {_size_mb(path):5.2f} MB  "
+              f"single row {sklearn_ms:6.2f} ms -> {fused_ms:6.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", default=list(registry.MODEL_SPECS))
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--format", choices=["npz", "mmap", "both"], default="mmap")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    for name in args.names:
+        export(name, args.samples, ["npz", "mmap"] if args.format == "both" else [args.format])
+
+
+if __name__ == "__main__":
+    main()
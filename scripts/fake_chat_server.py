@@ -0,0 +1,52 @@
+"""Local stand-in for the chat model, for running AI_Chatbot offline.
+
+    python scripts/fake_chat_server.py --port 8799
+    CHAT_BACKEND_URL=http://127.0.0.1:8799/chat streamlit run app.py
+
+Answers every POST with a canned reply, streamed word by word as
+newline-delimited JSON ({"text": "..."}), with a small delay per token.
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(token_delay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            messages = body.get("messages", [])
+            question = messages[-1]["content"] if messages else ""
+            reply = (f"(fake model, {len(messages)} message(s) in context) "
+                     f"You asked: {question}. Please consult a doctor for medical advice.")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for word in reply.split(" "):
+                line = (json.dumps({"text": word + " "}) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+                time.sleep(token_delay)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    args = parser.parse_args()
+    ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.token_delay)).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
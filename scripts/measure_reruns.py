@@ -0,0 +1,264 @@
+"""Rerun count and latency per page of app.py, replayed with Streamlit's AppTest.
+
+Each page is driven through a typical session: fill in every field, predict
+and save the appointment on the disease and Screening pages; upload an MRI, predict and
+save on Brain; pick an engine and upload audio on Speech. For every
+interaction the script works out what the browser would rerun and runs
+exactly that, timing it:
+
+    none      a field inside st.form (sent with the form's submit button)
+    fragment  a widget inside st.fragment (only that fragment reruns)
+    full      anything else (the whole script reruns)
+
+    python scripts/measure_reruns.py [--pages Heart,Brain] [--repeat 3] [--verbose]
+    python scripts/measure_reruns.py --rev HEAD~1    # app.py as of another commit
+
+Latencies are AppTest wall times, so they include the test harness but are
+comparable between revisions. Models are loaded before the first measured
+interaction, and predictions go to a throwaway database.
+"""
+import argparse
+import contextlib
+import functools
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DISEASE_PAGES = ["Heart", "Diabetes", "Kidney", "Liver"]
+PAGES = DISEASE_PAGES + ["Screening", "Brain", "Speech"]
+USER = "rerun-bench"
+
+
+# ===================== APPTEST HOOKS =====================
+# AppTest always reruns the whole script and drops the fragment ids of the
+# elements it parses. The last run's messages are kept to map widgets to
+# their fragment, and a fragment rerun is queued the way the browser does.
+_last_messages = []
+
+
+def _install_hooks():
+    from streamlit.testing.v1 import local_script_runner
+    forward_msgs = local_script_runner.LocalScriptRunner.forward_msgs
+
+    def recording_forward_msgs(self):
+        messages = forward_msgs(self)
+        _last_messages[:] = messages
+        return messages
+
+    local_script_runner.LocalScriptRunner.forward_msgs = recording_forward_msgs
+
+
+@contextlib.contextmanager
+def _fragment_scope(fragment_id):
+    from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+    from streamlit.testing.v1 import local_script_runner
+    local_script_runner.RerunData = functools.partial(
+        RerunData, fragment_id_queue=[fragment_id], is_fragment_scoped_rerun=True
+    )
+    try:
+        yield
+    finally:
+        local_script_runner.RerunData = RerunData
+
+
+def _widget_fragments():
+    fragments = {}
+    for msg in _last_messages:
+        if not (msg.HasField("delta") and msg.delta.HasField("new_element")):
+            continue
+        element = msg.delta.new_element
+        kind = element.WhichOneof("type")
+        widget_id = getattr(getattr(element, kind), "id", "") if kind else ""
+        if widget_id:
+            fragments[widget_id] = msg.delta.fragment_id
+    return fragments
+
+
+# ===================== SESSION =====================
+class Session:
+    def __init__(self, script, page):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(script, default_timeout=300)
+        self.at.session_state['page'] = page
+        self.at.session_state['logged_in'] = True
+        self.at.session_state['current_user'] = USER
+        self.steps = []
+        self.error = None
+        self.fragments = {}
+        # Page load (and model loading) is not counted
+        self._run(None)
+
+    def _run(self, fragment_id):
+        scope = _fragment_scope(fragment_id) if fragment_id else contextlib.nullcontext()
+        start = time.perf_counter()
+        with scope:
+            self.at.run()
+        elapsed = time.perf_counter() - start
+        # After a fragment rerun AppTest only holds that fragment's elements,
+        # so scenarios keep their fragment interactions last
+        self.fragments.update(_widget_fragments())
+        if self.at.exception and self.error is None:
+            self.error = self.at.exception[0].value.splitlines()[0]
+        return elapsed
+
+    def interact(self, name, widget, action):
+        if widget is None or self.error:
+            return
+        action(widget)
+        if widget.form_id and not getattr(widget.proto, "is_form_submitter", False):
+            self.steps.append((name, "none", 0.0))
+            return
+        fragment_id = self.fragments.get(widget.id) or None
+        elapsed = self._run(fragment_id)
+        self.steps.append((name, "fragment" if fragment_id else "full", elapsed))
+
+
+def _find(widgets, label):
+    return next((w for w in widgets if w.label == label), None)
+
+
+def _bump(widget):
+    # A different valid value for a number input or selectbox
+    if widget.type == "selectbox":
+        index = widget.options.index(str(widget.value)) if str(widget.value) in widget.options else 0
+        return widget.select_index((index + 1) % len(widget.options))
+    step = widget.step or 1
+    value = widget.value + step
+    if widget.max is not None and value > widget.max:
+        value = widget.value - step
+    return widget.set_value(value)
+
+
+def _wav_bytes(seconds=1.0, rate=16000):
+    import numpy as np
+    t = np.arange(int(seconds * rate)) / rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def _png_bytes(side=256):
+    import numpy as np
+    from PIL import Image
+    pixels = np.random.default_rng(0).integers(0, 255, (side, side, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# ===================== SCENARIOS =====================
+def disease_session(script, page, submit="🔍 Predict"):
+    session = Session(script, page)
+    at = session.at
+    fields = [w for w in list(at.number_input) + list(at.selectbox)]
+    for widget in fields:
+        session.interact(widget.label, widget, _bump)
+    session.interact("Predict", _find(at.button, submit), lambda w: w.click())
+    session.interact("Save Appointment", _find(at.button, "✅ Save Appointment"), lambda w: w.click())
+    return session
+
+
+def brain_session(script, page):
+    session = Session(script, page)
+    at = session.at
+    session.interact("Upload MRI", _find(at.file_uploader, "Upload Brain MRI Image"),
+                     lambda w: w.set_value(("mri.png", _png_bytes(), "image/png")))
+    session.interact("Predict", _find(at.button, "🔍 Predict Brain Tumor"), lambda w: w.click())
+    session.interact("Save Appointment", _find(at.button, "✅ Save Appointment"), lambda w: w.click())
+    return session
+
+
+def speech_session(script, page):
+    session = Session(script, page)
+    at = session.at
+    session.interact("Engine", _find(at.selectbox, "Engine"), lambda w: w.set_value("stub"))
+    session.interact("Upload WAV", _find(at.file_uploader, "Upload WAV file"),
+                     lambda w: w.set_value(("note.wav", _wav_bytes(), "audio/wav")))
+    return session
+
+
+def screening_session(script, page):
+    # Same flow as a disease page; Save Appointment appears when a disease is flagged
+    return disease_session(script, page, submit="🔍 Screen All")
+
+
+SCENARIOS = {**{page: disease_session for page in DISEASE_PAGES},
+             "Screening": screening_session, "Brain": brain_session, "Speech": speech_session}
+
+
+# ===================== REPORT =====================
+def summarize(sessions):
+    steps = sessions[0].steps
+    count = {kind: sum(1 for _, k, _ in steps if k == kind) for kind in ("full", "fragment", "none")}
+    # Median over repeats of the total time spent rerunning
+    totals = [sum(seconds for _, _, seconds in s.steps) for s in sessions]
+    reruns = [seconds for s in sessions for _, kind, seconds in s.steps if kind != "none"]
+    return {
+        "interactions": len(steps),
+        **count,
+        "total_ms": statistics.median(totals) * 1000,
+        "median_ms": statistics.median(reruns) * 1000 if reruns else 0.0,
+    }
+
+
+def script_for(rev):
+    if rev is None:
+        return os.path.join(ROOT, "app.py")
+    source = subprocess.run(["git", "show", f"{rev}:app.py"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    handle, path = tempfile.mkstemp(prefix="app_", suffix=".py")
+    with os.fdopen(handle, "w") as f:
+        f.write(source)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default=",".join(PAGES), help="comma-separated, from " + ",".join(PAGES))
+    parser.add_argument("--rev", help="measure app.py as of this git revision")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--verbose", action="store_true", help="print every interaction")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    # Keep the benchmark's predictions out of the real database, and load
+    # models on demand instead of racing the background warm-up
+    os.environ.setdefault("DIAGNOSTICS_DB_PATH", os.path.join(tempfile.mkdtemp(), "rerun_bench.db"))
+    os.environ.setdefault("WARMUP_MODELS", "")
+    _install_hooks()
+    from diagnostics.store import get_store
+    get_store().create_user(USER, "rerun-bench")
+    script = script_for(args.rev)
+
+    print(f"app.py @ {args.rev or 'working tree'}, {args.repeat} repeat(s)")
+    print(f"{'page':<10}{'interactions':>13}{'full':>6}{'fragment':>10}{'none':>6}{'rerun total':>13}{'per rerun':>11}")
+    for page in [p.strip() for p in args.pages.split(",") if p.strip()]:
+        if page not in SCENARIOS:
+            raise SystemExit(f"Unknown page: {page}")
+        sessions = [SCENARIOS[page](script, page) for _ in range(args.repeat)]
+        if sessions[0].error:
+            print(f"{page:<10}  unavailable: {sessions[0].error}")
+            continue
+        s = summarize(sessions)
+        print(f"{page:<10}{s['interactions']:>13}{s['full']:>6}{s['fragment']:>10}{s['none']:>6}"
+              f"{s['total_ms']:>10.0f} ms{s['median_ms']:>8.1f} ms")
+        if args.verbose:
+            for name, kind, seconds in sessions[0].steps:
+                print(f"    {name:<40}{kind:>10}{seconds * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
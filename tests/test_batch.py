@@ -0,0 +1,85 @@
+import gc
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from diagnostics.batch import download_reader, score_file
+from diagnostics.registry import MODEL_SPECS, get_model
+
+
+def _heart_csv(rows=20):
+    spec = MODEL_SPECS["heart"]
+    X = np.tile(spec["defaults"], (rows, 1))
+    return pd.DataFrame(X, columns=spec["features"]).to_csv(index=False).encode()
+
+
+def test_download_reader_streams_result_file_until_dropped():
+    bundle = get_model("heart")
+    result_file, summary = score_file(bundle.model, bundle.scaler, bundle.features,
+                                      io.BytesIO(_heart_csv()), "heart.csv", "Heart Disease")
+    read = download_reader(result_file)
+    first, second = read(), read()
+    assert isinstance(first, io.BufferedReader)
+    data = first.read()
+    assert second.read() == data
+    first.close()
+    second.close()
+    scored = pd.read_csv(io.BytesIO(data))
+    assert len(scored) == summary["rows"] == 20
+    assert list(scored.columns[-3:]) == ["prediction", "rule_alert", "result"]
+
+    path = result_file.name
+    del read
+    gc.collect()
+    assert result_file.closed
+    assert not os.path.exists(path)
+
+
+def _batch_page():
+    from diagnostics.batch import batch_scoring_section
+    from diagnostics.registry import get_model
+    from diagnostics.rules import get_rules
+    bundle = get_model("heart")
+    batch_scoring_section("Heart Disease", bundle.model, bundle.scaler, bundle.features,
+                          rules=get_rules("heart", bundle.features))
+
+
+def test_batch_section_renders_download_button():
+    at = AppTest.from_function(_batch_page, default_timeout=60)
+    at.run()
+    at.get("file_uploader")[0].set_value(("heart.csv", _heart_csv(), "text/csv"))
+    at.run()
+    next(b for b in at.button if b.label == "▶️ Score File").click().run()
+    assert not at.exception
+    assert at.success[0].value.startswith("Scored 20 rows")
+    assert [d.proto.label for d in at.get("download_button")] == ["📥 Download Results (CSV)"]
+
+
+def _score_upload(name, data, mime):
+    at = AppTest.from_function(_batch_page, default_timeout=60)
+    at.run()
+    at.get("file_uploader")[0].set_value((name, data, mime))
+    at.run()
+    next(b for b in at.button if b.label == "▶️ Score File").click().run()
+    return at
+
+
+def test_unreadable_parquet_shows_error():
+    buffer = io.BytesIO()
+    pd.read_csv(io.BytesIO(_heart_csv())).to_parquet(buffer)
+    good = buffer.getvalue()
+    corrupt = good[:4] + b"\0" * (len(good) - 8) + good[-4:]
+    for data in (b"not a parquet file", corrupt):
+        at = _score_upload("heart.parquet", data, "application/octet-stream")
+        assert not at.exception
+        assert at.error[0].value.startswith("Could not read Parquet file")
+        assert not at.get("download_button")
+
+
+def test_non_utf8_csv_shows_error():
+    at = _score_upload("heart.csv", _heart_csv().decode().encode("utf-16"), "text/csv")
+    assert not at.exception
+    assert at.error[0].value == "Could not read CSV file: it is not UTF-8 encoded"
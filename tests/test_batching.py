@@ -0,0 +1,51 @@
+import threading
+
+import numpy as np
+import pytest
+
+from diagnostics.batching import BatcherOverloaded, BatcherTimeout, MicroBatcher
+
+
+def test_concurrent_requests_share_batches_and_get_their_own_rows():
+    release = threading.Event()
+    sizes = []
+
+    def predict_fn(batch):
+        release.wait(5)
+        sizes.append(len(batch))
+        return batch.sum(axis=1)
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=50)
+    futures = [batcher.submit(np.full(3, i, dtype=np.float32)) for i in range(12)]
+    release.set()
+    assert [f.result(5) for f in futures] == [3.0 * i for i in range(12)]
+    assert sum(sizes) == 12 and max(sizes) <= 8 and len(sizes) < 12
+    stats = batcher.stats()
+    assert stats["completed"] == 12 and stats["batches"] == len(sizes)
+
+
+def test_short_output_fails_every_future():
+    batcher = MicroBatcher(lambda batch: batch[:1], max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(np.zeros(2)) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="returned 1 rows"):
+            future.result(5)
+    assert batcher.stats()["failed"] == 3
+
+
+def test_predict_times_out():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda batch: release.wait(5) and batch, max_wait_ms=1)
+    with pytest.raises(BatcherTimeout):
+        batcher.predict(np.zeros(2), timeout=0.05)
+    release.set()
+
+
+def test_full_queue_is_rejected():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda batch: release.wait(5) and batch, max_batch_size=1, max_wait_ms=0, max_queue=1)
+    batcher.submit(np.zeros(1))
+    with pytest.raises(BatcherOverloaded):
+        for _ in range(3):
+            batcher.submit(np.zeros(1))
+    release.set()
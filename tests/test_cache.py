@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from diagnostics import cache
+from diagnostics.cache import LRUCache, cached_predict
+from diagnostics.fused import FoldedScaler
+from diagnostics.registry import ModelBundle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert lru.stats()["evictions"] == 1 and len(lru) == 2
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    lru = LRUCache(maxsize=8, ttl=10, clock=clock)
+    lru.set("a", 1)
+    clock.now = 9.9
+    assert lru.get("a") == 1
+    clock.now = 10.0
+    assert lru.get("a", "gone") == "gone"
+    assert len(lru) == 0
+    stats = lru.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+
+def test_get_or_compute_computes_once_until_expiry():
+    clock = FakeClock()
+    lru = LRUCache(maxsize=8, ttl=5, clock=clock)
+    calls = []
+
+    def compute():
+        calls.append(clock.now)
+        return len(calls)
+
+    assert lru.get_or_compute("k", compute) == 1
+    assert lru.get_or_compute("k", compute) == 1
+    clock.now = 6
+    assert lru.get_or_compute("k", compute) == 2
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return (X[:, 0] > 50).astype(np.int64)
+
+
+@pytest.fixture
+def isolated_caches(monkeypatch):
+    monkeypatch.setattr(cache, "_prediction_caches", {})
+
+
+def test_cached_predict_reuses_answers_per_model_version(isolated_caches):
+    model = CountingModel()
+    bundle = ModelBundle("test", model, FoldedScaler(), ["Age"], version="v1")
+    assert cached_predict(bundle, [60]) == 1
+    assert cached_predict(bundle, [60.0]) == 1
+    assert cached_predict(bundle, [40]) == 0
+    assert model.rows == 2
+
+    retrained = ModelBundle("test", model, FoldedScaler(), ["Age"], version="v2")
+    assert cached_predict(retrained, [60]) == 1
+    assert model.rows == 3
+    assert cache.prediction_cache_stats()["test"]["hits"] == 1
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from diagnostics.chat import ChatBackend, ChatHistory, _chunk_text, faq_cache, faq_key, stream_reply
+
+
+class EchoBackend(ChatBackend):
+    name = "echo"
+
+    def stream(self, messages):
+        yield "reply to " + messages[-1]["content"]
+
+
+def _roles(messages):
+    return [m["role"] for m in messages]
+
+
+def _alternates(messages):
+    roles = _roles(messages)
+    return roles[0] == "user" and all(a != b for a, b in zip(roles, roles[1:]))
+
+
+def test_compaction_keeps_roles_alternating():
+    history = ChatHistory(token_budget=200)
+    for i in range(30):
+        history.append("user", f"question {i} " + "word " * (5 + i % 7 * 6))
+        assert _alternates(history.context())
+        history.append("assistant", f"answer {i} " + "word " * (40 + i % 5 * 10))
+        assert _alternates(history.context())
+    assert history.summary_lines
+    assert history.context()[0]["content"].startswith("Summary of the earlier conversation")
+
+
+def test_compaction_keeps_newest_exchange_over_budget():
+    history = ChatHistory(token_budget=40)
+    history.append("user", "short")
+    history.append("assistant", "reply")
+    history.append("user", "word " * 200)
+    live = history.context()[2:]
+    assert _roles(live) == ["user"]
+    history.append("assistant", "word " * 200)
+    assert _roles(history.context()[2:]) == ["user", "assistant"]
+
+
+def test_distinct_non_ascii_questions_do_not_share_faq_entry():
+    faq_cache.clear()
+    tamil = [{"role": "user", "content": "வகை 2 நீரிழிவு அறிகுறிகள் என்ன?"}]
+    hindi = [{"role": "user", "content": "टाइप 2 मधुमेह के लक्षण क्या हैं?"}]
+    assert "".join(stream_reply(EchoBackend(), tamil, [])) == "reply to வகை 2 நீரிழிவு அறிகுறிகள் என்ன?"
+    assert "".join(stream_reply(EchoBackend(), hindi, [])) == "reply to टाइप 2 मधुमेह के लक्षण क्या हैं?"
+    assert len(faq_cache) == 2
+
+
+def test_symbol_only_questions_are_not_cached():
+    faq_cache.clear()
+    assert faq_key("🤒🤒🤒?") is None
+    "".join(stream_reply(EchoBackend(), [{"role": "user", "content": "🤒🤒🤒?"}], []))
+    assert len(faq_cache) == 0
+
+
+def test_gemini_chunks_without_parts_are_skipped():
+    part = SimpleNamespace(text="Drink water.")
+    assert _chunk_text(SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])) == "Drink water."
+    # Safety-blocked / finish-only chunks
+    assert _chunk_text(SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[]))])) == ""
+    assert _chunk_text(SimpleNamespace(candidates=[])) == ""
@@ -0,0 +1,24 @@
+from streamlit.testing.v1 import AppTest
+
+from diagnostics import chat
+
+
+class FailingBackend(chat.ChatBackend):
+    name = "failing"
+
+    def stream(self, messages):
+        yield "partial "
+        raise RuntimeError("quota exceeded")
+
+
+def test_backend_error_is_shown_but_not_stored(monkeypatch):
+    monkeypatch.setattr(chat, "CHAT_BACKEND_URL", "http://127.0.0.1:9/chat")
+    monkeypatch.setattr(chat, "_backend", FailingBackend())
+    at = AppTest.from_file("../pages/AI_Chatbot.py", default_timeout=30)
+    at.run()
+    at.chat_input[0].set_value("What are the symptoms of diabetes?").run()
+    assert not at.exception
+    assert "quota exceeded" in at.error[0].value
+    history = at.session_state.history
+    assert history.messages == []
+    assert history.context() == []
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from diagnostics.fused import compile_model, fold_thresholds
+from diagnostics.registry import MODEL_SPECS, RoutedModel, _load_pickle_bundle, get_model
+
+TABULAR = ["heart", "diabetes", "kidney", "liver"]
+
+
+def _sklearn_left(x, threshold, mean, scale):
+    return ((x - mean) / scale).astype(np.float32) <= threshold
+
+
+def test_fold_thresholds_is_the_last_value_going_left():
+    rng = np.random.default_rng(0)
+    threshold = rng.normal(size=2000)
+    mean = rng.normal(100, 50, size=2000)
+    scale = rng.uniform(0.01, 80, size=2000)
+    folded = fold_thresholds(threshold, mean, scale)
+    assert _sklearn_left(folded, threshold, mean, scale).all()
+    assert not _sklearn_left(np.nextafter(folded, np.inf), threshold, mean, scale).any()
+
+
+def test_fold_thresholds_past_float32_range():
+    # Scaled values that overflow float32 still bisect to the right boundary
+    threshold, mean, scale = np.array([1e39, -1e39, np.inf]), np.zeros(3), np.full(3, 1e-3)
+    folded = fold_thresholds(threshold, mean, scale)
+    assert folded[2] == np.inf
+    assert _sklearn_left(folded[:2], threshold[:2], mean[:2], scale[:2]).all()
+    assert not _sklearn_left(np.nextafter(folded[:2], np.inf), threshold[:2], mean[:2], scale[:2]).any()
+
+
+def _edge_rows(bundle, fused, n=300, seed=0):
+    # Default patients with one feature moved onto a split threshold, or just above it
+    rng = np.random.default_rng(seed)
+    defaults = np.asarray(MODEL_SPECS[bundle.name]["defaults"], dtype=np.float64)
+    splits = np.flatnonzero(np.isfinite(fused.threshold))
+    rows = np.tile(defaults, (2 * n, 1))
+    for i, node in enumerate(rng.choice(splits, n, replace=False)):
+        t = fused.threshold[node]
+        rows[2 * i, fused.feature[node]] = t
+        rows[2 * i + 1, fused.feature[node]] = np.nextafter(t, np.inf)
+    return rows
+
+
+@pytest.mark.parametrize("name", TABULAR)
+def test_fused_matches_sklearn_on_split_edges(name):
+    bundle = _load_pickle_bundle(name)
+    fused = compile_model(bundle.model, bundle.scaler)
+    X = _edge_rows(bundle, fused)
+    expected = bundle.model.predict_proba(bundle.scaler.transform(X))
+    np.testing.assert_allclose(fused.predict_proba(X), expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(fused.predict(X), bundle.model.predict(bundle.scaler.transform(X)))
+
+
+@pytest.mark.parametrize("name", TABULAR)
+def test_served_model_matches_sklearn(name):
+    served, reference = get_model(name), _load_pickle_bundle(name)
+    spec = MODEL_SPECS[name]
+    rng = np.random.default_rng(1)
+    low, high = np.array([(lo, hi) for _, lo, hi in spec["inputs"]], dtype=np.float64).T
+    X = rng.uniform(low, high, size=(200, len(low)))
+    np.testing.assert_array_equal(served.model.predict(served.scaler.transform(X)),
+                                  reference.model.predict(reference.scaler.transform(X)))
+
+
+def test_routed_model_sends_large_batches_to_sklearn():
+    reference = _load_pickle_bundle("heart")
+    fused = compile_model(reference.model, reference.scaler)
+    routed = RoutedModel("heart", fused, max_rows=4)
+    X = np.tile(MODEL_SPECS["heart"]["defaults"], (5, 1)).astype(np.float64)
+    np.testing.assert_allclose(routed.predict_proba(X[:4]), fused.predict_proba(X[:4]))
+    assert routed._pipeline is None
+    np.testing.assert_allclose(routed.predict_proba(X), reference.model.predict_proba(reference.scaler.transform(X)))
+    assert routed._pipeline is not None
+    assert routed.fix_features(X[0], [0]).depth == fused.depth
@@ -0,0 +1,59 @@
+import operator
+
+import numpy as np
+import pytest
+
+from diagnostics.registry import MODEL_SPECS
+from diagnostics.rules import RULE_SPECS, RuleSet, alert_text, get_rules
+
+SCALAR_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+
+def _fires(spec, features, row):
+    value = row[features.index(spec["feature"])]
+    return not np.isnan(value) and SCALAR_OPS[spec["op"]](value, spec["threshold"])
+
+
+@pytest.mark.parametrize("name", sorted(RULE_SPECS))
+def test_mask_matches_rule_by_rule_check(name):
+    features = MODEL_SPECS[name]["features"]
+    rules = get_rules(name, features)
+    rng = np.random.default_rng(0)
+    X = np.tile(np.asarray(MODEL_SPECS[name]["defaults"], dtype=np.float64), (300, 1))
+    for j, spec in enumerate(RULE_SPECS[name]):
+        column = features.index(spec["feature"])
+        # Around each threshold, exactly on it, and missing
+        X[:, column] = spec["threshold"] + rng.choice([-1.0, -0.01, 0.0, 0.01, 1.0, np.nan], len(X))
+    fired = rules.evaluate(X)
+    expected = [[_fires(spec, features, row) for spec in RULE_SPECS[name]] for row in X]
+    np.testing.assert_array_equal(fired, expected)
+
+
+def test_single_row_and_reasons():
+    features = MODEL_SPECS["heart"]["features"]
+    rules = get_rules("heart", features)
+    row = list(MODEL_SPECS["heart"]["defaults"])
+    row[features.index("Cholesterol")] = 320
+    row[features.index("Max HR")] = 90
+    fired = rules.evaluate(row)
+    assert fired.shape == (1, 3)
+    assert rules.describe(fired[0]) == "Cholesterol > 300, Max heart rate < 100"
+    batch = rules.evaluate([row, MODEL_SPECS["heart"]["defaults"]])
+    assert rules.reasons(batch).tolist() == ["Cholesterol > 300, Max heart rate < 100", ""]
+    assert alert_text("Heart Disease", rules.describe(fired[0])) == (
+        "Possible Heart Disease Detected (Rule-Based Alert: Cholesterol > 300, Max heart rate < 100)"
+    )
+
+
+def test_invalid_specs_are_rejected():
+    with pytest.raises(KeyError, match="Pulse"):
+        RuleSet("x", [{"feature": "Pulse", "op": ">", "threshold": 1, "label": "Pulse"}], ["Age"])
+    with pytest.raises(ValueError, match="=="):
+        RuleSet("x", [{"feature": "Age", "op": "==", "threshold": 1, "label": "Age"}], ["Age"])
+
+
+def test_rules_are_compiled_once_per_feature_order():
+    features = MODEL_SPECS["liver"]["features"]
+    assert get_rules("liver", features) is get_rules("liver", tuple(features))
+    assert get_rules("liver", features[::-1]) is not get_rules("liver", features)
+    assert get_rules("brain", ["pixel"]).evaluate([[1.0]]).shape == (1, 0)
@@ -0,0 +1,91 @@
+import io
+import struct
+import threading
+import time
+import wave
+
+import numpy as np
+import pytest
+
+from diagnostics.speech import SpeechBackend, TranscriptionError, read_wav, transcribe_chunks
+
+
+def _pcm_wav(samples, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.astype("<i2").tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def _float_wav(samples, rate=16000):
+    # WAVE_FORMAT_IEEE_FLOAT (3), which the wave module refuses to read
+    data = samples.astype("<f4").tobytes()
+    fmt = struct.pack("<HHIIHH", 3, 1, rate, rate * 4, 4, 32)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(data)) + data
+    return io.BytesIO(b"RIFF" + struct.pack("<I", len(body)) + body)
+
+
+def test_read_wav_pcm():
+    samples = (np.sin(np.arange(1600) / 10) * 8000).astype(np.int16)
+    decoded, rate = read_wav(_pcm_wav(samples))
+    assert rate == 16000
+    assert np.array_equal(decoded, samples)
+
+
+def test_read_wav_rejects_non_wav_upload():
+    with pytest.raises(ValueError, match="Unsupported or corrupt WAV file"):
+        read_wav(io.BytesIO(b"ID3\x03\x00 not a wav file" * 10))
+
+
+def test_read_wav_rejects_float_wav():
+    with pytest.raises(ValueError, match="Unsupported or corrupt WAV file"):
+        read_wav(_float_wav(np.zeros(1600)))
+
+
+class CountingBackend(SpeechBackend):
+    name = "counting"
+
+    def __init__(self, fail_at=None, delay=0.02):
+        self.fail_at = fail_at
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def transcribe(self, pcm, rate):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        if call == self.fail_at:
+            raise TranscriptionError("quota exceeded")
+        time.sleep(self.delay)
+        return f"chunk {call}"
+
+
+def _chunks(n, size=160):
+    return np.zeros(n * size, dtype=np.int16), 16000, [(i * size, (i + 1) * size) for i in range(n)]
+
+
+def test_failed_chunk_cancels_the_rest():
+    samples, rate, chunks = _chunks(200)
+    backend = CountingBackend(fail_at=1)
+    start = time.perf_counter()
+    with pytest.raises(TranscriptionError):
+        list(transcribe_chunks(samples, rate, backend, chunks, max_workers=2))
+    # 200 chunks at 20 ms on 2 workers would take ~2 s without cancelling
+    assert time.perf_counter() - start < 0.5
+    assert backend.calls < 20
+
+
+def test_closing_the_generator_cancels_the_rest():
+    samples, rate, chunks = _chunks(200)
+    backend = CountingBackend()
+    parts = transcribe_chunks(samples, rate, backend, chunks, max_workers=2)
+    next(parts)
+    start = time.perf_counter()
+    parts.close()
+    assert time.perf_counter() - start < 0.5
+    assert backend.calls < 20
@@ -0,0 +1,61 @@
+import sqlite3
+
+import pytest
+
+from diagnostics.store import PAGE_SIZE, Store
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Store(str(tmp_path / "data" / "diagnostics.db"), pool_size=2)
+
+
+def test_passwords_are_salted_hashes(store):
+    assert store.create_user("asha", "s3cret")
+    assert store.create_user("ravi", "s3cret")
+    assert not store.create_user("asha", "other")
+
+    with sqlite3.connect(store.path) as conn:
+        rows = dict(conn.execute("SELECT username, password_hash || ':' || salt FROM users"))
+    assert "s3cret" not in rows["asha"]
+    assert rows["asha"] != rows["ravi"]
+
+    assert store.verify_user("asha", "s3cret")
+    assert not store.verify_user("asha", "other")
+    assert not store.verify_user("nobody", "s3cret")
+    assert store.user_exists("asha") and not store.user_exists("nobody")
+
+
+def test_predictions_page_newest_first(store):
+    store.create_user("asha", "pw")
+    for i in range(PAGE_SIZE + 3):
+        store.add_prediction("asha", "Heart Disease", f"result {i}", {"Age": 40 + i})
+    store.add_prediction("ravi", "Liver Disease", "other user")
+
+    first = store.predictions("asha")
+    second = store.predictions("asha", offset=PAGE_SIZE)
+    assert len(first) == PAGE_SIZE and len(second) == 3
+    results = [row["result"] for row in first + second]
+    assert results == [f"result {i}" for i in reversed(range(PAGE_SIZE + 3))]
+    assert first[0]["inputs"] == {"Age": 40 + PAGE_SIZE + 2}
+    assert store.count_predictions("asha") == PAGE_SIZE + 3
+    assert store.count_predictions("ravi") == 1
+
+
+def test_appointments_page_and_require_a_user(store):
+    store.create_user("asha", "pw")
+    for doctor in ["Dr. A", "Dr. B", "Dr. C"]:
+        store.add_appointment("asha", "Kidney Disease", doctor, "https://example.org")
+    assert [row["doctor"] for row in store.appointments("asha", limit=2)] == ["Dr. C", "Dr. B"]
+    assert [row["doctor"] for row in store.appointments("asha", limit=2, offset=2)] == ["Dr. A"]
+    assert store.count_appointments("asha") == 3
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_appointment("nobody", "Kidney Disease", "Dr. A", "https://example.org")
+
+
+def test_data_survives_a_new_store(store):
+    store.create_user("asha", "pw")
+    store.add_prediction("asha", "Diabetes", "No Diabetes Detected")
+    reopened = Store(store.path, pool_size=1)
+    assert reopened.verify_user("asha", "pw")
+    assert reopened.predictions("asha")[0]["inputs"] is None